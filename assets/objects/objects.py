@@ -1,6 +1,8 @@
 import numpy as np
 import os
-from utils.graphics import Object, Camera, Shader
+from utils.obj_loader import load_obj
+from utils.asset_pack import load_meshes
+from utils.asset_registry import AssetRegistry, MeshProps
 from assets.shaders.shaders import standard_shader
 
 ###############################################################
@@ -17,27 +19,9 @@ from assets.shaders.shaders import standard_shader
 
 ###############################################################
 
-def load_obj(filepath, colors):
-    vertices = []
-    faces = []
-    color_index = 0
-    with open(filepath, 'r') as file:
-        for line in file:
-            if line.startswith('v '):
-                parts = line.split()
-                color = colors[color_index % len(colors)]
-                vertices.append([float(parts[1]), float(parts[2]), float(parts[3]), color[0], color[1], color[2]])
-                color_index += 1
-            elif line.startswith('f '):
-                parts = line.split()
-                face = [int(part.split('/')[0]) - 1 for part in parts[1:]]
-                faces.append(face)
-    vertices = np.array(vertices, dtype=np.float32)
-    faces = np.array(faces, dtype=np.int32)
-    faces = faces.flatten()
-    return vertices, faces
-
 def create_object(filepath, shader, objType='generic'):
+    # Imported here so that the props below can be read without OpenGL (by the headless simulation)
+    from utils.graphics import Object
     vertices, faces = load_obj(filepath)
     properties = {
         'vertices': vertices,
@@ -59,56 +43,56 @@ def create_object(filepath, shader, objType='generic'):
 # laser = create_object('./assets/objects/models/laser.obj', shader, objType='laser')
 # spacestation = create_object('./assets/objects/models/spacestation.obj', shader, objType='spacestation')
 
-transporterVerts, transporterInds = load_obj('./assets/objects/models/transporter.obj', colors=[[0, 0, 1], [0, 0, 0.5], [0, 0, 0.25]])
-pirateVerts, pirateInds = load_obj('./assets/objects/models/pirate.obj', colors=[[0, 1, 0], [0, 0.5, 0], [0, 0.25, 0]])
-planetVerts, planetInds = load_obj('./assets/objects/models/planet.obj', colors=[[0, 1, 1], [0, 0.5, 0.5], [0, 0.25, 0.25]])
-laserVerts, laserInds = load_obj('./assets/objects/models/laser.obj', colors=[[1, 0, 1], [0.5, 0, 0.5], [0.25, 0, 0.25]])
-spacestationVerts, spacestationInds = load_obj('./assets/objects/models/spacestation.obj', colors=[[1, 1, 0], [0.5, 0.5, 0], [0.25, 0.25, 0]])
+# OBJ sources and their vertex colours. They are cooked once into a binary pack (see utils/asset_pack.py)
+# which is memory-mapped on later runs and re-cooked automatically when a source file changes.
+models = {
+    'transporter': ('./assets/objects/models/transporter.obj', [[0, 0, 1], [0, 0, 0.5], [0, 0, 0.25]]),
+    'pirate': ('./assets/objects/models/pirate.obj', [[0, 1, 0], [0, 0.5, 0], [0, 0.25, 0]]),
+    'planet': ('./assets/objects/models/planet.obj', [[0, 1, 1], [0, 0.5, 0.5], [0, 0.25, 0.25]]),
+    'laser': ('./assets/objects/models/laser.obj', [[1, 0, 1], [0.5, 0, 0.5], [0.25, 0, 0.25]]),
+    'spacestation': ('./assets/objects/models/spacestation.obj', [[1, 1, 0], [0.5, 0.5, 0], [0.25, 0.25, 0]])
+}
+modelPack = './assets/objects/cache/models.pack'
+
+# Meshes are loaded lazily through the registry: nothing is parsed at import time, App.DrawMainMenu prefetches them in the
+# background and the first Object created from one of the props below blocks until they are ready.
+assets = AssetRegistry()
+assets.Register('meshes', lambda: load_meshes(models, modelPack))
 
-transporterProps = {
-    'vertices': transporterVerts,
-    'indices': transporterInds,
+transporterProps = MeshProps(assets, 'meshes', 'transporter', {
     'position': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'rotation': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'scale': np.array([1.0, 1.0, 1.0], dtype=np.float32),
     'colour': np.array([0.0, 1.0, 0.0, 1.0], dtype=np.float32)
-}
+})
 
-pirateProps = {
-    'vertices': pirateVerts,
-    'indices': pirateInds,
+pirateProps = MeshProps(assets, 'meshes', 'pirate', {
     'position': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'rotation': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'scale': np.array([1.0, 1.0, 1.0], dtype=np.float32),
     'colour': np.array([0.0, 0.0, 1.0, 1.0], dtype=np.float32)
-}
+})
 
-planetProps = {
-    'vertices': planetVerts,
-    'indices': planetInds,
+planetProps = MeshProps(assets, 'meshes', 'planet', {
     'position': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'rotation': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'scale': np.array([1.0, 1.0, 1.0], dtype=np.float32),
     'colour': np.array([1.0, 0.0, 1.0, 1.0], dtype=np.float32)
-}
+})
 
-laserProps = {
-    'vertices': laserVerts,
-    'indices': laserInds,
+laserProps = MeshProps(assets, 'meshes', 'laser', {
     'position': np.array([2.0, 2.0, 2.0], dtype=np.float32),
     'rotation': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'scale': np.array([1.0, 1.0, 1.0], dtype=np.float32),
     'colour': np.array([0.0, 1.0, 1.0, 1.0], dtype=np.float32)
-}
+})
 
-spacestationProps = {
-    'vertices': spacestationVerts,
-    'indices': spacestationInds,
+spacestationProps = MeshProps(assets, 'meshes', 'spacestation', {
     'position': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'rotation': np.array([0.0, 0.0, 0.0], dtype=np.float32),
     'scale': np.array([1.0, 1.0, 1.0], dtype=np.float32),
     'colour': np.array([1.0, 1.0, 0.0, 1.0], dtype=np.float32)
-}
+})
 
 
 # Define vertices and indices for a simple 3D cube
@@ -122,7 +106,7 @@ cube_vertices = np.array([
      1, -1,  1,   0.0, 1.0, 1.0,  # Cyan
      1,  1, -1,   1.0, 1.0, 1.0,  # White
      1,  1,  1,   0.0, 0.0, 0.0   # Black
-], dtype=np.float32)
+], dtype=np.float32).reshape(-1, 6)
 
 cube_indices = np.array([
     0, 1, 3,  
@@ -137,7 +121,7 @@ cube_indices = np.array([
     0, 6, 4,  
     1, 3, 7,  
     1, 7, 5  
-], dtype=np.uint32)
+], dtype=np.uint16)
 
 cube_props = {
     'vertices': cube_vertices,
@@ -157,12 +141,12 @@ arrow_vertices = np.array([
      0.0,  0.2,  0.0,  1.0, 0.6, 0.0,  # Middle
     -0.2, -0.2,  0.0,  1.0, 0.3, 0.0,  # Left middle
      0.2, -0.2,  0.0,  1.0, 0.3, 0.0,  # Right middle
-], dtype=np.float32)
+], dtype=np.float32).reshape(-1, 6)
 
 arrow_indices = np.array([
     0, 1, 2,  # Tip triangle
     3, 4, 5   # Base quadrilateral
-], dtype=np.uint32)
+], dtype=np.uint16)
 
 arrow_props = {
     'vertices': arrow_vertices,
@@ -186,12 +170,12 @@ crosshair_vertices = np.array([
     -0.02, -0.25, 0.0, 1.0, 1.0, 1.0,  # Bottom left
     0.02, -0.25, 0.0, 1.0, 1.0, 1.0,  # Bottom right
     0.02, 0.25, 0.0, 1.0, 1.0, 1.0,  # Top right
-], dtype=np.float32)
+], dtype=np.float32).reshape(-1, 6)
 
 crosshair_indices = np.array([
     0, 1, 2, 0, 2, 3,  # Horizontal line
     4, 5, 6, 4, 6, 7  # Vertical line
-], dtype=np.uint32)
+], dtype=np.uint16)
         
 crosshair_props = {
     'vertices': crosshair_vertices,
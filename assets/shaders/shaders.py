@@ -9,9 +9,12 @@ standard_shader = {
         layout(location = 0) in vec3 vertexPosition;
 
         uniform mat4 modelMatrix;
-        uniform mat4 viewMatrix;
-        uniform mat4 projectionMatrix;
-        uniform float focalLength;
+        // Shared by all programs and filled once per frame by Camera.Update
+        layout(std140, row_major) uniform Camera {
+            mat4 viewMatrix;
+            mat4 projectionMatrix;
+            float focalLength;
+        };
 
         void main() {
             vec4 camCoordPos = viewMatrix * modelMatrix * vec4(vertexPosition, 1.0);
@@ -38,6 +41,48 @@ standard_shader = {
 
 }
 
+# Instanced variant of standard_shader: the model matrix and colour come from a per-instance vertex buffer
+# (locations 2-5 hold the matrix columns, 6 the colour) so that all instances of a mesh are drawn in one call
+instanced_shader = {
+    "vertex_shader" : '''
+        
+        #version 330 core
+        layout(location = 0) in vec3 vertexPosition;
+        layout(location = 2) in mat4 instanceModelMatrix;
+        layout(location = 6) in vec4 instanceColour;
+
+        // Shared by all programs and filled once per frame by Camera.Update
+        layout(std140, row_major) uniform Camera {
+            mat4 viewMatrix;
+            mat4 projectionMatrix;
+            float focalLength;
+        };
+
+        flat out vec4 objectColour;
+
+        void main() {
+            vec4 camCoordPos = viewMatrix * instanceModelMatrix * vec4(vertexPosition, 1.0);
+            gl_Position = projectionMatrix * vec4(focalLength * (camCoordPos[0] / abs(camCoordPos[2])), focalLength * (camCoordPos[1] / abs(camCoordPos[2])), camCoordPos[2], 1.0);
+            objectColour = instanceColour;
+        }
+
+        ''',
+
+        "fragment_shader" : '''
+
+        #version 330 core
+
+        flat in vec4 objectColour;
+        out vec4 outputColour;
+
+        void main() {
+            outputColour = objectColour;
+        }
+
+        '''
+
+}
+
 edge_shader = {
     "vertex_shader" : '''
         
@@ -45,8 +90,12 @@ edge_shader = {
         layout(location = 0) in vec3 vertexPosition;
 
         uniform mat4 modelMatrix;
-        uniform mat4 viewMatrix;
-        uniform mat4 projectionMatrix;
+        // Shared by all programs and filled once per frame by Camera.Update
+        layout(std140, row_major) uniform Camera {
+            mat4 viewMatrix;
+            mat4 projectionMatrix;
+            float focalLength;
+        };
 
         void main() {
             gl_Position = projectionMatrix * viewMatrix * modelMatrix * vec4(vertexPosition, 1.0);
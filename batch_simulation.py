@@ -0,0 +1,307 @@
+import argparse
+import itertools
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from simulation import Simulation, PLANET, SPACE_STATION, PIRATE, PLAYING, WON, LOST, LASER_CAPACITY
+from utils.steering import steer_pirates_stacked
+from utils.collision import swept_sphere_hits, first_hits
+
+###############################################################
+# Batched multi-world simulation
+#
+# Many independent games stepped together: every per-world array of the Simulation gets a leading world axis
+# (pirates (W, N, 3), lasers (W, L, 3), transporters (W, 3), ...) and one Step() advances all worlds with the same
+# array operations. Worlds are laid out by Simulation.Reset(seed) and follow the same rules in the same order, so a
+# world evolves exactly like a Simulation with that seed and those inputs. Pirates and lasers are packed at the front
+# of their world's rows, with a count per world. Finished worlds are dropped from the arrays after their tick.
+#
+# run_worlds() shards the worlds over a process pool, drives them with the autopilot and aggregates the outcomes.
+# Run as a script for balance sweeps: python batch_simulation.py --worlds 1024 --n_pirates 10 20 40
+
+# Simulation attributes a batch can override, the ones marked for sweeps can take several values on the command line
+PARAMETERS = ('max_speed', 'acceleration', 'rotation_speed', 'laser_cooldown_time', 'laser_speed', 'laser_time_to_live',
+              'max_laser_distance', 'pirate_speed', 'n_planets', 'n_spaceStations', 'n_pirates')
+SWEEPS = {'n_pirates': int, 'pirate_speed': float, 'laser_cooldown_time': float, 'max_speed': float}
+
+CONTROLS = ('W', 'S', 'A', 'D', 'Q', 'E', 'SPACE', 'R_CLICK', 'L_CLICK')
+
+def forward_directions(rotations):
+    # Direction the transporter flies in for (W, 3) rotations, the float32 math of Simulation.Step() with the two
+    # matrix products written out: rotation_90_y @ (rotation_matrix @ [0, 0, -1])
+    (cx, cy, cz), (sx, sy, sz) = np.cos(rotations).T, np.sin(rotations).T
+    column = np.stack([cz * sy * cx + sz * sx, cz * sy * sx - sz * cx, cz * cy], axis=1).astype(np.float32)
+    return np.stack([column[:, 2], -column[:, 1], -column[:, 0]], axis=1)
+
+def packed(counts, capacity):
+    # (W, capacity) mask of the rows in use
+    return np.arange(capacity) < counts[:, np.newaxis]
+
+class BatchSimulation:
+    # Per-world state, in the order finished worlds are dropped
+    STATE = ('worlds', 'planets', 'stations', 'stationPlanet', 'destination', 'pirates', 'pirateCount', 'position',
+             'rotation', 'speed', 'viewMode', 'cooldown', 'cameraPosition', 'cameraLookAt', 'laserPosition',
+             'laserPrevious', 'laserVelocity', 'laserSpawnTime', 'laserCount')
+
+    def __init__(self, seeds, tickRate=60, laserCapacity=LASER_CAPACITY, **parameters):
+        # One world per seed. parameters override the Simulation attributes in PARAMETERS. A world only matches a
+        # Simulation while it never has more than laserCapacity lasers alive, keep the Simulation's pool size for that.
+        world = Simulation(tickRate)
+        for name, value in parameters.items():
+            if name not in PARAMETERS:
+                raise KeyError(f"Unknown simulation parameter {name}")
+            setattr(world, name, value)
+        self.tickTime = world.tickTime
+        for name in PARAMETERS:
+            setattr(self, name, getattr(world, name))
+
+        layouts = []
+        for seed in seeds:
+            world.Reset(seed)
+            entities = world.entities
+            planets, stations = entities.Rows(PLANET), entities.Rows(SPACE_STATION)
+            layouts.append((entities.position[planets],
+                            np.searchsorted(planets, entities.RowsOf(entities.anchor[stations])),
+                            np.searchsorted(stations, entities.Row(world.destination)),
+                            entities.position[entities.Rows(PIRATE)],
+                            world.transporter['position'], world.transporter['rotation']))
+        planets, stationPlanet, destination, pirates, position, rotation = (np.array(column) for column in zip(*layouts))
+
+        count = len(layouts)
+        self.worlds = np.arange(count) # Index of each remaining world in seeds
+        self.planets = planets
+        self.stationPlanet = stationPlanet
+        self.stations = np.take_along_axis(planets, stationPlanet[..., np.newaxis], axis=1) + np.array([0, 0, 10], dtype=np.float32)
+        self.destination = destination
+        self.pirates = pirates
+        self.pirateCount = np.full(count, pirates.shape[1])
+        self.position = position
+        self.rotation = rotation
+        self.speed = np.zeros(count)
+        self.viewMode = np.ones(count, dtype=np.int8)
+        self.cooldown = np.zeros(count)
+        self.cameraPosition = np.tile(np.array([-15/1.5,-1,4/1.5], dtype=np.float32), (count, 1)).astype(np.float64)
+        self.cameraLookAt = np.tile(np.array([1,0,0], dtype=np.float32), (count, 1))
+        self.laserPosition = np.zeros((count, laserCapacity, 3))
+        self.laserPrevious = np.zeros((count, laserCapacity, 3))
+        self.laserVelocity = np.zeros((count, laserCapacity, 3))
+        self.laserSpawnTime = np.zeros((count, laserCapacity))
+        self.laserCount = np.zeros(count, dtype=np.int64)
+
+        # Outcomes by world index: status and the tick count when the world finished
+        self.status = np.full(count, PLAYING)
+        self.endTicks = np.zeros(count, dtype=np.int64)
+        self.ticks = 0
+        self.worldSteps = 0 # World ticks simulated, finished worlds no longer count
+
+    def Run(self, policy, maxTicks):
+        # Steps every world with the inputs policy(batch) returns until all are finished or maxTicks have run
+        while len(self.worlds) and self.ticks < maxTicks:
+            self.Step(policy(self))
+        return self.status
+
+    def Step(self, inputs):
+        # One tick of every remaining world. inputs maps the CONTROLS to a bool per remaining world (or one for all).
+        count = len(self.worlds)
+        if count == 0:
+            return False
+        currentTime, deltaTime = self.ticks * self.tickTime, self.tickTime
+        self.ticks += 1
+        self.worldSteps += count
+        pressed = {key: np.broadcast_to(np.asarray(inputs[key], dtype=bool), (count,)) for key in CONTROLS}
+        status = np.full(count, PLAYING)
+        # Laser slots past every world's count are never read, so per-tick laser work only spans the widest world
+        width = int(self.laserCount.max())
+        self.laserPrevious[:, :width] = self.laserPosition[:, :width]
+
+        ############################################################################
+        # Inputs: 3rd person view maneuvers, 1st person view shoots
+        self.viewMode = np.where(pressed['R_CLICK'], 2, 1).astype(np.int8)
+        self.cooldown = np.where(self.cooldown > 0, self.cooldown - deltaTime, self.cooldown)
+
+        maneuvering = self.viewMode == 1
+        rotationStep = self.rotation_speed * deltaTime
+        for axis, (decrease, increase) in enumerate((('W', 'S'), ('A', 'D'), ('Q', 'E'))):
+            self.rotation[:, axis] -= np.where(maneuvering & pressed[decrease], rotationStep, 0.0)
+            self.rotation[:, axis] += np.where(maneuvering & pressed[increase], rotationStep, 0.0)
+        accelerating = maneuvering & pressed['SPACE']
+        self.speed = np.where(accelerating, np.minimum(self.speed + self.acceleration * deltaTime, self.max_speed), self.speed)
+
+        firing = np.flatnonzero((self.viewMode == 2) & pressed['L_CLICK'] & (self.cooldown <= 0))
+        if len(firing):
+            self.SpawnLasers(firing, currentTime)
+            self.cooldown[firing] = self.laser_cooldown_time
+
+        ############################################################################
+        # Transporter and space stations
+        forward = forward_directions(self.rotation)
+        self.position += forward * self.speed.astype(np.float32)[:, np.newaxis] * np.float32(deltaTime)
+
+        toDestination = self.position - self.stations[np.arange(count), self.destination]
+        status[np.sqrt(np.einsum('ij,ij->i', toDestination, toDestination)) < 5.0] = WON
+
+        angle = currentTime * 0.5
+        radius = 10.0
+        self.stations = np.take_along_axis(self.planets, self.stationPlanet[..., np.newaxis], axis=1) + np.array([
+            radius * np.cos(angle),
+            radius * np.sin(angle),
+            0
+        ], dtype=np.float32)
+
+        ############################################################################
+        # Lasers: move, expire, and destroy the first pirate on their path
+        width = int(self.laserCount.max())
+        laserPosition = self.laserPosition[:, :width]
+        laserPosition += self.laserVelocity[:, :width] * deltaTime
+        lasersLive = packed(self.laserCount, width)
+        expired = (currentTime - self.laserSpawnTime[:, :width] > self.laser_time_to_live) | \
+                  (np.linalg.norm(laserPosition - self.position[:, np.newaxis, :], axis=2) > self.max_laser_distance)
+        keep = lasersLive & ~expired
+
+        laserWorld, laser = np.nonzero(lasersLive)
+        pirateWorld, pirate = np.nonzero(packed(self.pirateCount, self.pirates.shape[1]))
+        hitLasers, hitPirates = first_hits(*swept_sphere_hits(self.laserPrevious[laserWorld, laser], self.laserPosition[laserWorld, laser],
+                                                              self.pirates[pirateWorld, pirate], 3.0,
+                                                              pairs=lambda a, b, radius: same_world_pairs(laserWorld, pirateWorld)))
+        keep[laserWorld[hitLasers], laser[hitLasers]] = False
+        self.KeepLasers(keep)
+        self.DespawnPirates(pirateWorld[hitPirates], pirate[hitPirates])
+
+        ############################################################################
+        # Pirates: steer towards the transporter, the first one that reaches it ends the game
+        piratesLive = packed(self.pirateCount, self.pirates.shape[1])
+        directions, _ = steer_pirates_stacked(self.pirates, piratesLive, self.position, self.planets, self.stations, separation=5.0)
+
+        toTransporter = (self.pirates - self.position[:, np.newaxis, :]).reshape(-1, 3)
+        caught = piratesLive & (np.sqrt(np.einsum('ij,ij->i', toTransporter, toTransporter)).reshape(piratesLive.shape) < 3.0)
+        lost = caught.any(axis=1)
+        status[lost] = LOST
+        # Pirates after the first one that got there stay put this tick
+        moving = piratesLive & (np.arange(self.pirates.shape[1]) < np.where(lost, caught.argmax(axis=1), self.pirates.shape[1])[:, np.newaxis])
+        self.pirates[moving] += (directions * self.pirate_speed * deltaTime)[moving]
+
+        ############################################################################
+        # Camera, lasers are fired from it
+        self.cameraLookAt = forward
+        self.cameraPosition = np.where((self.viewMode == 1)[:, np.newaxis],
+                                       self.position - 10 * forward + np.array([0, 0, 5], dtype=np.float32),
+                                       self.position + forward * 5)
+
+        finished = status != PLAYING
+        if finished.any():
+            self.status[self.worlds[finished]] = status[finished]
+            self.endTicks[self.worlds[finished]] = self.ticks
+            for name in self.STATE:
+                setattr(self, name, getattr(self, name)[~finished])
+        return True
+
+    def SpawnLasers(self, worlds, spawnTime):
+        # Same as ProjectilePool.Spawn(): appended in firing order, the oldest laser of a full world makes room
+        full = worlds[self.laserCount[worlds] == self.laserPosition.shape[1]]
+        if len(full):
+            keep = packed(self.laserCount, self.laserPosition.shape[1])
+            keep[full, 0] = False
+            self.KeepLasers(keep)
+        slots = self.laserCount[worlds]
+        direction = self.cameraLookAt[worlds] - self.cameraPosition[worlds]
+        self.laserPosition[worlds, slots] = self.cameraPosition[worlds] + 2*direction
+        self.laserPrevious[worlds, slots] = self.laserPosition[worlds, slots]
+        self.laserVelocity[worlds, slots] = -direction * self.laser_speed
+        self.laserSpawnTime[worlds, slots] = spawnTime
+        self.laserCount[worlds] += 1
+
+    def KeepLasers(self, keep):
+        # Order-preserving compaction of every world's lasers down to the rows where keep is set
+        world, row = np.nonzero(keep)
+        target = (np.cumsum(keep, axis=1) - 1)[world, row]
+        for column in (self.laserPosition, self.laserPrevious, self.laserVelocity, self.laserSpawnTime):
+            column[world, target] = column[world, row]
+        self.laserCount = keep.sum(axis=1)
+
+    def DespawnPirates(self, worlds, rows):
+        # Swap-remove, highest row first within a world, the order EntityStore.DespawnDead() removes them in
+        for world, row in sorted(zip(worlds.tolist(), rows.tolist()), key=lambda hit: (hit[0], -hit[1])):
+            last = self.pirateCount[world] - 1
+            self.pirates[world, row] = self.pirates[world, last]
+            self.pirateCount[world] = last
+
+def same_world_pairs(laserWorld, pirateWorld):
+    # Every (laser, pirate) pair of the same world, pirateWorld sorted. Broadphase for swept_sphere_hits(), which then
+    # runs the exact test on them.
+    first = np.searchsorted(pirateWorld, laserWorld, side='left')
+    counts = np.searchsorted(pirateWorld, laserWorld, side='right') - first
+    segment = np.repeat(np.arange(len(laserWorld)), counts)
+    sphere = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - first, counts)
+    return segment, sphere
+
+def autopilot(batch, engageDistance=30.0):
+    # Full speed towards the destination, turning with whichever single key points the nose closest to it, and firing
+    # from the 1st person view while a pirate is within engageDistance
+    count = len(batch.worlds)
+    target = batch.stations[np.arange(count), batch.destination] - batch.position
+    step = batch.rotation_speed * batch.tickTime
+    turns = np.array([[0, 0, 0], [-step, 0, 0], [step, 0, 0], [0, -step, 0], [0, step, 0]])
+    candidates = forward_directions((batch.rotation[np.newaxis, :, :] + turns[:, np.newaxis, :]).reshape(-1, 3)).reshape(len(turns), count, 3)
+    best = np.argmax(np.einsum('kwi,wi->kw', candidates, target), axis=0)
+
+    toPirates = np.linalg.norm(batch.pirates - batch.position[:, np.newaxis, :], axis=2)
+    engaged = np.any(packed(batch.pirateCount, batch.pirates.shape[1]) & (toPirates < engageDistance), axis=1)
+    inputs = {key: best == turn for turn, key in enumerate(('', 'W', 'S', 'A', 'D')) if key}
+    inputs.update(Q=False, E=False, SPACE=True, R_CLICK=engaged, L_CLICK=engaged)
+    return inputs
+
+def simulate_shard(shard):
+    seeds, maxTicks, tickRate, parameters = shard
+    batch = BatchSimulation(seeds, tickRate, **parameters)
+    batch.Run(autopilot, maxTicks)
+    return batch.status, batch.endTicks * batch.tickTime, batch.worldSteps
+
+def run_worlds(worlds, maxTicks, processes=None, shardSize=256, firstSeed=0, tickRate=60, **parameters):
+    # Simulates worlds games (seeds firstSeed, firstSeed + 1, ...) on a process pool, shardSize worlds per batch,
+    # and returns their outcome statistics
+    seeds = np.arange(firstSeed, firstSeed + worlds)
+    shards = [(seeds[start:start + shardSize], maxTicks, tickRate, parameters) for start in range(0, worlds, shardSize)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(simulate_shard, shards))
+    elapsed = time.perf_counter() - start
+
+    status = np.concatenate([result[0] for result in results])
+    endTimes = np.concatenate([result[1] for result in results])
+    worldSteps = sum(result[2] for result in results)
+    won, lost = endTimes[status == WON], endTimes[status == LOST]
+    return {
+        'worlds': worlds,
+        'won': len(won),
+        'lost': len(lost),
+        'unfinished': int(np.count_nonzero(status == PLAYING)),
+        'time to destination': (float(np.mean(won)), float(np.median(won)), float(np.percentile(won, 90))) if len(won) else None,
+        'time to loss': float(np.mean(lost)) if len(lost) else None,
+        'world steps': worldSteps,
+        'seconds': elapsed,
+        'world steps per second': worldSteps / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Balance sweep over batched headless games")
+    parser.add_argument('--worlds', type=int, default=1024, help="games per parameter combination")
+    parser.add_argument('--seconds', type=float, default=120.0, help="simulated time limit per game")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument('--shard', type=int, default=256, help="worlds stepped together in one process")
+    parser.add_argument('--tick_rate', type=int, default=60, help="simulation ticks per simulated second")
+    for name, kind in SWEEPS.items():
+        parser.add_argument(f'--{name}', type=kind, nargs='+', default=[None])
+    arguments = parser.parse_args()
+
+    print(f"{'parameters':<48}{'won':>6}{'lost':>6}{'open':>6}{'to destination mean/median/p90 (s)':>38}{'to loss mean (s)':>18}{'world steps/s':>15}")
+    for values in itertools.product(*(getattr(arguments, name) for name in SWEEPS)):
+        parameters = {name: value for name, value in zip(SWEEPS, values) if value is not None}
+        stats = run_worlds(arguments.worlds, int(arguments.seconds * arguments.tick_rate), arguments.processes, arguments.shard,
+                           tickRate=arguments.tick_rate, **parameters)
+        destination = '-' if stats['time to destination'] is None else '{:.1f} / {:.1f} / {:.1f}'.format(*stats['time to destination'])
+        loss = '-' if stats['time to loss'] is None else f"{stats['time to loss']:.1f}"
+        label = ' '.join(f"{name}={value}" for name, value in parameters.items()) or 'defaults'
+        print(f"{label:<48}{stats['won']:>6}{stats['lost']:>6}{stats['unfinished']:>6}{destination:>38}{loss:>18}{stats['world steps per second']:>15.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Compares model loading through the binary asset pack against parsing the OBJ files with load_obj.
+# Run from anywhere: python benchmarks/bench_asset_pack.py [repeats]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.obj_loader import load_obj
+from utils.asset_pack import load_meshes
+from utils.mesh_optimizer import optimize_mesh
+
+models = {
+    'transporter': ('./assets/objects/models/transporter.obj', [[0, 0, 1], [0, 0, 0.5], [0, 0, 0.25]]),
+    'pirate': ('./assets/objects/models/pirate.obj', [[0, 1, 0], [0, 0.5, 0], [0, 0.25, 0]]),
+    'planet': ('./assets/objects/models/planet.obj', [[0, 1, 1], [0, 0.5, 0.5], [0, 0.25, 0.25]]),
+    'laser': ('./assets/objects/models/laser.obj', [[1, 0, 1], [0.5, 0, 0.5], [0.25, 0, 0.25]]),
+    'spacestation': ('./assets/objects/models/spacestation.obj', [[1, 1, 0], [0.5, 0.5, 0], [0.25, 0.25, 0]])
+}
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return np.median(samples) * 1000.0
+
+def touch(meshes):
+    # Force the mapped pages in, the GPU upload would read every byte anyway
+    return sum(float(mesh['vertices'].sum()) + int(mesh['indices'].sum()) for mesh in meshes.values())
+
+def main(repeats):
+    with tempfile.TemporaryDirectory() as tmp:
+        packPath = os.path.join(tmp, 'models.pack')
+
+        def legacy():
+            for filepath, colors in models.values():
+                load_obj(filepath, colors)
+
+        def cold():
+            if os.path.exists(packPath):
+                os.remove(packPath)
+            touch(load_meshes(models, packPath))
+
+        def warm():
+            touch(load_meshes(models, packPath))
+
+        legacyMs = timed(legacy, repeats)
+        coldMs = timed(cold, repeats)
+        warmMs = timed(warm, repeats)
+
+        meshes = load_meshes(models, packPath)
+        for name, (filepath, colors) in models.items():
+            vertices, indices = optimize_mesh(*load_obj(filepath, colors))
+            assert np.array_equal(vertices, meshes[name]['vertices']) and np.array_equal(indices, meshes[name]['indices']), name
+        packSize = os.path.getsize(packPath)
+
+    print(f"{'load_obj (all models)':<28}{legacyMs:10.2f} ms")
+    print(f"{'pack cold (parse + cook)':<28}{coldMs:10.2f} ms")
+    print(f"{'pack warm (mmap)':<28}{warmMs:10.2f} ms   ({legacyMs / warmMs:.1f}x faster than load_obj)")
+    print(f"{'pack size':<28}{packSize / 1024:10.1f} KiB")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,58 @@
+# Times the vectorized frustum test (world-space bounding spheres for every object, then one plane test) against testing
+# the objects one at a time, for growing numbers of objects spread over the world cube, and reports the fraction culled.
+# Run from anywhere: python benchmarks/bench_culling.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.culling import frustum_planes, world_spheres, spheres_visible
+from utils.transforms import model_matrices
+
+sizes = [100, 1000, 10000]
+
+def view_matrix(position, forward, up=np.array([0.0, 0.0, 1.0])):
+    n = -forward / np.linalg.norm(forward)
+    u = np.cross(up, n)
+    u /= np.linalg.norm(u)
+    v = np.cross(n, u)
+    rotation = np.eye(4)
+    rotation[:3, :3] = [u, v, n]
+    translation = np.eye(4)
+    translation[:3, 3] = -position
+    return rotation @ translation
+
+def visible_per_object(planes, matrices, spheres, scales):
+    visible = []
+    for matrix, sphere, scale in zip(matrices, spheres, scales):
+        centre = matrix[:3, :3] @ sphere[:3] + matrix[:3, 3]
+        radius = sphere[3] * np.abs(scale).max()
+        visible.append(all(plane[:3] @ centre + plane[3] >= -radius for plane in planes))
+    return np.array(visible)
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000.0, result
+
+def main(repeats):
+    rng = np.random.RandomState(0)
+    planes = frustum_planes(view_matrix(np.array([-10.0, -1.0, 3.0]), np.array([1.0, 0.2, 0.0])), 90, 16 / 9, 1.0, 10000.0)
+    for size in sizes:
+        positions = rng.uniform(-500, 500, (size, 3))
+        rotations = rng.uniform(-np.pi, np.pi, (size, 3))
+        scales = rng.uniform(0.5, 3.0, (size, 3))
+        matrices = model_matrices(positions, rotations, scales)
+        spheres = np.column_stack([rng.uniform(-1, 1, (size, 3)), rng.uniform(1, 10, size)])
+        vectorized, visible = timed(lambda: spheres_visible(planes, *world_spheres(matrices, spheres, scales)), repeats)
+        loop, reference = timed(lambda: visible_per_object(planes, matrices, spheres, scales), max(1, repeats // 10))
+        assert np.array_equal(visible, reference)
+        print(f"{size:6d} objects: vectorized {vectorized:8.3f} ms, per object {loop:8.2f} ms "
+              f"({loop / vectorized:5.0f}x), {1 - visible.mean():.0%} culled")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
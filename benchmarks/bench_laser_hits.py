@@ -0,0 +1,57 @@
+# Counts the laser hits found by the end-point distance test and by the swept test when one second of laser flight
+# is simulated at different tick rates, and times the swept test. Run from anywhere: python benchmarks/bench_laser_hits.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.collision import swept_sphere_hits
+from utils.spatial_hash import pairs_within
+
+hitRadius = 3.0
+laserSpeed = 300.0 # Units per second, lasers fired from a moving camera are this fast and more
+tickRates = [240, 60, 30, 20]
+
+def scene(rng, laserCount, pirateCount):
+    # Lasers start on a plane and fly straight through a slab of pirates in front of it
+    pirates = rng.uniform([-100, -100, 50], [100, 100, 250], (pirateCount, 3))
+    starts = np.column_stack((rng.uniform(-100, 100, (laserCount, 2)), np.zeros(laserCount)))
+    velocities = np.tile([0.0, 0.0, laserSpeed], (laserCount, 1))
+    return starts, velocities, pirates
+
+def count_hits(starts, velocities, pirates, rate, swept):
+    # Pairs (laser, pirate) ever detected over one second; pirates stay in place so every pair counts once
+    found = set()
+    positions = starts.copy()
+    for _ in range(rate):
+        previous = positions.copy()
+        positions += velocities / rate
+        if swept:
+            lasers, hit, _ = swept_sphere_hits(previous, positions, pirates, hitRadius)
+        else:
+            lasers, hit = pairs_within(positions, pirates, hitRadius)
+        found.update(zip(lasers.tolist(), hit.tolist()))
+    return len(found)
+
+def main():
+    rng = np.random.default_rng(0)
+    starts, velocities, pirates = scene(rng, 500, 2000)
+    expected = len(swept_sphere_hits(starts, starts + velocities, pirates, hitRadius)[0])
+    print(f"laser/pirate contacts over one second: {expected}")
+    print(f"{'tick rate':>10}{'end point test':>16}{'swept test':>12}")
+    for rate in tickRates:
+        print(f"{rate:>8}Hz{count_hits(starts, velocities, pirates, rate, False):>16}{count_hits(starts, velocities, pirates, rate, True):>12}")
+
+    ends = starts + velocities / 20
+    samples = []
+    for _ in range(10):
+        begin = time.perf_counter()
+        swept_sphere_hits(starts, ends, pirates, hitRadius)
+        samples.append(time.perf_counter() - begin)
+    print(f"swept test, {len(starts)} lasers x {len(pirates)} pirates: {min(samples) * 1000.0:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Checks that the vectorized load_obj matches the original line-by-line parser on every shipped model and compares
+# their speed. Run from anywhere: python benchmarks/bench_obj_loader.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.obj_loader import load_obj
+
+colors = [[1, 1, 0], [0.5, 0.5, 0], [0.25, 0.25, 0]]
+models = ['laser', 'pirate', 'planet', 'spacestation', 'transporter']
+
+def load_obj_lines(filepath, colors):
+    # The original per-line parser, kept as the reference implementation
+    vertices = []
+    faces = []
+    color_index = 0
+    with open(filepath, 'r') as file:
+        for line in file:
+            if line.startswith('v '):
+                parts = line.split()
+                color = colors[color_index % len(colors)]
+                vertices.append([float(parts[1]), float(parts[2]), float(parts[3]), color[0], color[1], color[2]])
+                color_index += 1
+            elif line.startswith('f '):
+                parts = line.split()
+                face = [int(part.split('/')[0]) - 1 for part in parts[1:]]
+                faces.append(face)
+    vertices = np.array(vertices, dtype=np.float32)
+    faces = np.array(faces, dtype=np.int32)
+    faces = faces.flatten()
+    return vertices, faces
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000.0
+
+def main(repeats):
+    print(f"{'model':<16}{'identical':>10}{'lines (ms)':>12}{'numpy (ms)':>12}{'speedup':>9}")
+    for model in models:
+        filepath = f'./assets/objects/models/{model}.obj'
+        expected, actual = load_obj_lines(filepath, colors), load_obj(filepath, colors)
+        identical = all(a.dtype == b.dtype and a.shape == b.shape and np.array_equal(a.view(np.uint8), b.view(np.uint8))
+                        for a, b in zip(expected, actual))
+        linesMs = timed(lambda: load_obj_lines(filepath, colors), repeats)
+        numpyMs = timed(lambda: load_obj(filepath, colors), repeats)
+        print(f"{model:<16}{str(identical):>10}{linesMs:12.2f}{numpyMs:12.2f}{linesMs / numpyMs:8.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
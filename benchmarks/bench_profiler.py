@@ -0,0 +1,63 @@
+# Measures what the frame profiler costs per Begin/End pair (and per with-Scope block) while disabled and while
+# enabled, against an empty loop, and how long Stats() takes over a full ring buffer of frames.
+# Run from anywhere: python benchmarks/bench_profiler.py [pairs]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiler import FrameProfiler
+
+phases_per_frame = 12 # About what one frame of the game records
+
+def time_pairs(profiler, pairs):
+    start = time.perf_counter()
+    for i in range(pairs):
+        profiler.Begin('phase')
+        profiler.End()
+        if i % phases_per_frame == 0:
+            profiler.EndFrame()
+    return time.perf_counter() - start
+
+def time_scopes(profiler, pairs):
+    start = time.perf_counter()
+    for i in range(pairs):
+        with profiler.Scope('phase'):
+            pass
+        if i % phases_per_frame == 0:
+            profiler.EndFrame()
+    return time.perf_counter() - start
+
+def time_empty(pairs):
+    start = time.perf_counter()
+    for i in range(pairs):
+        if i % phases_per_frame == 0:
+            pass
+    return time.perf_counter() - start
+
+def main(pairs):
+    empty = time_empty(pairs)
+    print(f"{pairs} phases, {phases_per_frame} per frame, loop overhead subtracted")
+    for enabled in (False, True):
+        profiler = FrameProfiler()
+        profiler.Enable(enabled)
+        pairTime = time_pairs(profiler, pairs) - empty
+        profiler.Enable(enabled)
+        scopeTime = time_scopes(profiler, pairs) - empty
+        state = "enabled " if enabled else "disabled"
+        print(f"{state}: Begin/End {pairTime / pairs * 1e9:6.0f} ns, with Scope {scopeTime / pairs * 1e9:6.0f} ns, "
+              f"{phases_per_frame * max(pairTime, scopeTime) / pairs * 1e6:.2f} us per frame")
+
+    profiler = FrameProfiler()
+    profiler.Enable()
+    time_pairs(profiler, profiler.history.maxlen * phases_per_frame + 1)
+    profiler.Stats() # The first call pays for numpy's lazy imports
+    start = time.perf_counter()
+    stats = profiler.Stats()
+    print(f"Stats() over {len(profiler.history)} frames: {(time.perf_counter() - start) * 1000:.2f} ms "
+          f"({len(stats)} rows)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
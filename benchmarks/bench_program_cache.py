@@ -0,0 +1,63 @@
+# Times getting each of the game's shader programs by compiling and linking the GLSL against loading it from the program
+# binary cache (glProgramBinary), in a hidden window. The cache is kept in a temporary directory, the game's own is left
+# alone. Drivers with a shader cache of their own make the compile times look better than a first run.
+# Run from anywhere: python benchmarks/bench_program_cache.py [repeats]
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glfw
+import numpy as np
+from OpenGL.GL import *
+from utils.program_cache import ProgramCache, compile_program
+from assets.shaders import shaders
+
+programs = {name: getattr(shaders, name) for name in ('standard_shader', 'instanced_shader', 'edge_shader', 'hud_shader')}
+
+def hidden_window():
+    glfw.init()
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, GL_TRUE)
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    window = glfw.create_window(64, 64, "Program cache", None, None)
+    if not window:
+        glfw.terminate()
+        sys.exit("Glfw window can't be created")
+    glfw.make_context_current(window)
+    return window
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        glDeleteProgram(fn())
+        glFinish()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000.0
+
+def main(repeats):
+    window = hidden_window()
+    print(glGetString(GL_RENDERER).decode('utf-8', 'replace'), glGetString(GL_VERSION).decode('utf-8', 'replace'))
+    with tempfile.TemporaryDirectory() as cacheDir:
+        cache = ProgramCache(cacheDir)
+        for name, source in programs.items():
+            glDeleteProgram(cache.Load(source["vertex_shader"], source["fragment_shader"])) # Fills the cache
+        if not cache.supported:
+            print("The driver offers no program binary formats, programs are always compiled")
+
+        print(f"{'program':<20}{'compile ms':>12}{'cached ms':>12}")
+        for name, source in programs.items():
+            compileMs = timed(lambda: compile_program(source["vertex_shader"], source["fragment_shader"]), repeats)
+            cachedMs = timed(lambda: cache.Load(source["vertex_shader"], source["fragment_shader"]), repeats)
+            print(f"{name:<20}{compileMs:12.2f}{cachedMs:12.2f}")
+    glfw.destroy_window(window)
+    glfw.terminate()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
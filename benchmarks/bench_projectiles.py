@@ -0,0 +1,36 @@
+# Sustained auto-fire through the laser pool: one shot per tick, every live laser moved, expired and prepared for the
+# instanced draw each tick. Prints the per-tick cost for growing numbers of live lasers.
+# Run from anywhere: python benchmarks/bench_projectiles.py [ticks]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.projectiles import ProjectilePool
+
+liveCounts = [10, 100, 300, 500]
+deltaTime = 1.0 / 60.0
+
+def main(ticks):
+    rng = np.random.default_rng(0)
+    print(f"{'live lasers':>12}{'per tick (us)':>15}")
+    for live in liveCounts:
+        pool = ProjectilePool(capacity=512)
+        timeToLive = (live - 0.5) * deltaTime # Lasers expire as fast as they are fired, so the count stays at live
+        samples = []
+        for tick in range(live + ticks):
+            now = tick * deltaTime
+            start = time.perf_counter()
+            pool.Spawn(rng.uniform(-10, 10, 3), rng.normal(size=3) * 10.0, np.zeros(3), (1.0, 1.0, 1.0, 1.0), now)
+            pool.Advance(deltaTime)
+            pool.Keep(~pool.Expired(now, timeToLive, np.zeros(3), 500.0))
+            pool.ModelMatrices()
+            if tick >= live:
+                samples.append(time.perf_counter() - start)
+        print(f"{pool.count:>12}{np.median(samples) * 1e6:15.1f}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
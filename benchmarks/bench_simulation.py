@@ -0,0 +1,44 @@
+# Runs the headless simulation (no window, no OpenGL) on a scripted input stream and prints simulated ticks per second.
+# Games that end are restarted with the next seed. Run from anywhere: python benchmarks/bench_simulation.py [ticks]
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import Simulation, PLAYING, PIRATE
+
+keys = ["1", "W", "S", "A", "D", "Q", "E", "SPACE", "L_SHIFT", "R_CLICK", "L_CLICK"]
+
+def scripted_inputs():
+    # Accelerate and turn for a while, then aim and fire, over and over
+    for tick in itertools.count():
+        inputs = {key: False for key in keys}
+        inputs["mouseDelta"] = [0.0, 0.0]
+        phase = tick % 240
+        inputs["SPACE"] = phase < 60
+        inputs["A"] = 60 <= phase < 90
+        inputs["W"] = 90 <= phase < 110
+        inputs["R_CLICK"] = inputs["L_CLICK"] = phase >= 160
+        yield inputs
+
+def main(ticks):
+    if 'OpenGL' in sys.modules:
+        raise RuntimeError("the simulation imported OpenGL")
+    simulation = Simulation()
+    inputs = scripted_inputs()
+    seed, games, run, outcomes = 0, 0, 0, {}
+    start = time.perf_counter()
+    while run < ticks:
+        simulation.Reset(seed)
+        run += simulation.Run(itertools.islice(inputs, ticks - run))
+        outcomes[simulation.status] = outcomes.get(simulation.status, 0) + 1
+        seed, games = seed + 1, games + 1
+    elapsed = time.perf_counter() - start
+    print(f"{run} ticks in {elapsed:.2f} s: {run / elapsed:.0f} ticks/s ({games} games, "
+          f"{outcomes.get(PLAYING, 0)} unfinished, {len(simulation.entities.Rows(PIRATE))} pirates left in the last)")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,50 @@
+# Times the uniform grid broadphase (rebuild plus all pairs within each collision threshold) for growing numbers of
+# dynamic entities spread over the world cube, and checks it against brute force where that is affordable.
+# Run from anywhere: python benchmarks/bench_spatial_hash.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.spatial_hash import SpatialHash
+
+sizes = [100, 1000, 10000, 50000]
+radii = [3.0, 5.0, 15.0] # Laser hits and transporter collisions, pirate separation, planet avoidance
+worldMin, worldMax = np.array([-500.0, -500.0, -500.0]), np.array([500.0, 500.0, 500.0])
+
+def brute_force_pairs(positions, radius):
+    distances = np.linalg.norm(positions[:, np.newaxis] - positions[np.newaxis, :], axis=2)
+    i, j = np.nonzero(distances < radius)
+    return set(zip(i[i < j].tolist(), j[i < j].tolist()))
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+def main(repeats):
+    rng = np.random.default_rng(0)
+    print(f"{'entities':>9}" + "".join(f"{f'r={radius:g} (ms)':>14}{'us/entity':>11}{'pairs':>8}" for radius in radii))
+    for size in sizes:
+        positions = rng.uniform(worldMin, worldMax, (size, 3))
+        row = f"{size:>9}"
+        for radius in radii:
+            grid = SpatialHash(worldMin, worldMax, 2.0 * radius)
+            i, j = grid.Build(positions).Pairs(radius)
+            if size <= 1000:
+                # Also on the same entities packed into a 50 unit cube, where most of them have neighbours
+                for scene in (positions, positions * 0.05):
+                    pi, pj = grid.Build(scene).Pairs(radius)
+                    assert set(zip(pi.tolist(), pj.tolist())) == brute_force_pairs(scene, radius), (size, radius)
+            seconds = timed(lambda: grid.Build(positions).Pairs(radius), repeats)
+            row += f"{seconds * 1000.0:14.2f}{seconds / size * 1e6:11.2f}{len(i):8}"
+        print(row)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
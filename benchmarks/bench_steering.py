@@ -0,0 +1,84 @@
+# Checks the batched pirate steering against the original per-pirate loop and times it for growing pirate counts
+# against the 60 Hz frame budget. Run from anywhere: python benchmarks/bench_steering.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.steering import steer_pirates
+
+sizes = [20, 200, 2000, 5000]
+frameBudget = 1.0 / 60.0
+
+def steer_pirates_loop(pirates, target, planets, stations, collision_distance_objects=5.0):
+    # The original per-pirate loop, kept as the reference implementation. It reads the start-of-tick positions like
+    # the batched kernel does.
+    directions = np.zeros_like(pirates)
+    for index, pirate in enumerate(pirates):
+        direction_to_transporter = target - pirate
+        distance_to_transporter = np.linalg.norm(direction_to_transporter)
+        if distance_to_transporter > 0:
+            direction_to_transporter = direction_to_transporter / distance_to_transporter
+        avoidance_force = np.zeros(3, dtype=np.float32)
+        for otherIndex, other_pirate in enumerate(pirates):
+            if otherIndex != index:
+                dir_to_other = pirate - other_pirate
+                dist_to_other = np.linalg.norm(dir_to_other)
+                if dist_to_other < collision_distance_objects and dist_to_other > 0:
+                    avoidance_force += dir_to_other / (dist_to_other * dist_to_other) * 10.0
+        for planet in planets:
+            dir_to_planet = pirate - planet
+            dist_to_planet = np.linalg.norm(dir_to_planet)
+            if dist_to_planet < collision_distance_objects * 3 and dist_to_planet > 0:
+                avoidance_force += dir_to_planet / (dist_to_planet * dist_to_planet) * 20.0
+        for station in stations:
+            dir_to_station = pirate - station
+            dist_to_station = np.linalg.norm(dir_to_station)
+            if dist_to_station < collision_distance_objects and dist_to_station > 0:
+                avoidance_force += dir_to_station / (dist_to_station * dist_to_station) * 15.0
+        if np.linalg.norm(avoidance_force) > 0:
+            avoidance_force = avoidance_force / np.linalg.norm(avoidance_force)
+        combined_direction = 0.7 * direction_to_transporter + 0.3 * avoidance_force
+        if np.linalg.norm(combined_direction) > 0:
+            combined_direction = combined_direction / np.linalg.norm(combined_direction)
+        directions[index] = combined_direction
+    return directions
+
+def scene(rng, pirateCount, spread):
+    # Planets and stations as in Game.InitScene, pirates spread over a cube of the given half size so that a small
+    # spread packs them close enough for separation and obstacle avoidance to matter
+    planets = rng.uniform(-500, 500, (21, 3))
+    stations = planets + np.array([10.0, 0.0, 0.0])
+    pirates = rng.uniform(-spread, spread, (pirateCount, 3)) + planets[0]
+    return pirates, np.array([-1.0, -1.0, -1.0]), planets, stations
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+def main(repeats):
+    rng = np.random.default_rng(0)
+    for pirateCount, spread in ((20, 500.0), (200, 20.0), (500, 15.0)):
+        pirates, target, planets, stations = scene(rng, pirateCount, spread)
+        expected = steer_pirates_loop(pirates, target, planets, stations)
+        actual, _ = steer_pirates(pirates, target, planets, stations)
+        error = np.abs(actual - expected).max()
+        assert error < 1e-5, (pirateCount, error)
+        print(f"{pirateCount} pirates (spread {spread:g}): matches the loop, max difference {error:.1e}")
+
+    print(f"{'pirates':>8}{'loop (ms)':>11}{'batched (ms)':>14}{'of 60 Hz frame':>16}")
+    for pirateCount in sizes:
+        pirates, target, planets, stations = scene(rng, pirateCount, 100.0)
+        loopMs = timed(lambda: steer_pirates_loop(pirates, target, planets, stations), 1) * 1000.0 if pirateCount <= 200 else float('nan')
+        batchedMs = timed(lambda: steer_pirates(pirates, target, planets, stations), repeats) * 1000.0
+        print(f"{pirateCount:>8}{loopMs:11.1f}{batchedMs:14.2f}{batchedMs / (frameBudget * 1000.0):15.0%}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,180 @@
+# Reproducible benchmark suite with regression baselines. Builds seeded scenes of several sizes on the headless
+# Simulation, holds the number of live lasers of each scene at a fixed count, and times the update (Simulation.Step,
+# what Game.UpdateScene runs once per tick) and its sections through the frame profiler over many ticks. Also times
+# load_obj on every shipped model and scene initialization (Simulation.Reset) for each scene.
+#
+# Every metric is a median in milliseconds, the best of --rounds runs of the suite so that a burst of load on the machine
+# does not read as a regression. --save writes them to a JSON baseline, later runs compare against it and exit with
+# status 1 when a metric is slower than its baseline by more than --threshold (a fraction, 0.25 = 25%) and by more than
+# --floor milliseconds. Baselines only compare on the machine they were saved on.
+#
+# Run from anywhere:
+#   python benchmarks/bench_suite.py --save                 record benchmarks/baselines/local.json
+#   python benchmarks/bench_suite.py                        compare against it
+#   python benchmarks/bench_suite.py --scenes default --ticks 2000 --threshold 0.1
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from simulation import Simulation, PLAYING
+from utils.obj_loader import load_obj
+from utils.profiler import frameProfiler
+from assets.objects.objects import models
+
+# n_planets, n_spaceStations, n_pirates and the number of live lasers kept in flight
+SCENES = {
+    'small': {'n_planets': 10, 'n_spaceStations': 10, 'n_pirates': 10, 'lasers': 0},
+    'default': {'n_planets': 20, 'n_spaceStations': 20, 'n_pirates': 20, 'lasers': 0},
+    'lasers': {'n_planets': 20, 'n_spaceStations': 20, 'n_pirates': 20, 'lasers': 128},
+    'crowded': {'n_planets': 60, 'n_spaceStations': 120, 'n_pirates': 120, 'lasers': 256},
+}
+SECTIONS = ['input', 'transporter', 'stations', 'lasers', 'pirates', 'camera']
+keys = ["1", "W", "S", "A", "D", "Q", "E", "SPACE", "L_SHIFT", "R_CLICK", "L_CLICK"]
+
+def scripted_inputs(tick):
+    # Accelerate, turn and climb, never fire (the suite controls the number of lasers)
+    inputs = {key: False for key in keys}
+    inputs["mouseDelta"] = [0.0, 0.0]
+    phase = tick % 240
+    inputs["SPACE"] = phase < 60
+    inputs["A"] = 60 <= phase < 90
+    inputs["W"] = 90 <= phase < 110
+    return inputs
+
+def build_scene(scene, seed):
+    # Scenes are laid out by Simulation.Reset from the seed
+    simulation = Simulation()
+    for name in ('n_planets', 'n_spaceStations', 'n_pirates'):
+        setattr(simulation, name, scene[name])
+    simulation.Reset(seed)
+    return simulation
+
+def top_up_lasers(simulation, count, rng):
+    # Refills the pool to count live lasers around the transporter, flying in random directions
+    lasers = simulation.lasers
+    missing = count - lasers.count
+    if missing <= 0:
+        return
+    positions = simulation.transporter['position'] + rng.uniform(-200, 200, (missing, 3))
+    directions = rng.normal(size=(missing, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    white = np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+    for position, direction in zip(positions, directions):
+        lasers.Spawn(position, velocity=direction * simulation.laser_speed, rotation=np.zeros(3),
+                     colour=white, spawnTime=simulation.ticks * simulation.tickTime)
+
+def time_update(scene, seed, ticks, warmup=60):
+    # Median milliseconds per tick of the whole update and of each section. Laser top-ups and restarts after the
+    # game ends happen outside the timed ticks.
+    rng = np.random.RandomState(seed)
+    simulation = build_scene(scene, seed)
+    if scene['lasers'] > simulation.lasers.capacity:
+        raise ValueError(f"{scene['lasers']} lasers do not fit in a pool of {simulation.lasers.capacity}")
+    wasEnabled = frameProfiler.enabled
+    frameProfiler.Reset(frames=ticks)
+    for tick in range(warmup + ticks):
+        if tick == warmup:
+            frameProfiler.Enable()
+        if simulation.status != PLAYING:
+            simulation.Reset(seed)
+        top_up_lasers(simulation, scene['lasers'], rng)
+        with frameProfiler.Scope('UpdateScene'):
+            simulation.Step(scripted_inputs(tick))
+        frameProfiler.EndFrame()
+    stats = {name: p50 for name, depth, mean, p50, p95, p99, peak in frameProfiler.Stats()}
+    frameProfiler.Enable(wasEnabled)
+    frameProfiler.Reset(frames=300)
+    return {name: stats.get(name, 0.0) for name in ['UpdateScene'] + SECTIONS}
+
+def median_time(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000.0
+
+def run_suite(sceneNames, ticks, repeats, seed):
+    metrics = {}
+    for model, (path, colours) in models.items():
+        metrics[f'load_obj/{model}'] = median_time(lambda: load_obj(path, colours), repeats)
+    for name in sceneNames:
+        scene = SCENES[name]
+        simulation = build_scene(scene, seed)
+        seeds = iter(range(seed, seed + repeats))
+        metrics[f'{name}/init'] = median_time(lambda: simulation.Reset(next(seeds)), repeats)
+        for section, milliseconds in time_update(scene, seed, ticks).items():
+            metrics[f'{name}/{section}'] = milliseconds
+    return metrics
+
+def best_of(rounds, sceneNames, ticks, repeats, seed):
+    results = [run_suite(sceneNames, ticks, repeats, seed) for _ in range(rounds)]
+    return {name: min(result[name] for result in results) for name in results[0]}
+
+def compare(metrics, baseline, threshold, floor):
+    # Returns the metrics slower than baseline * (1 + threshold) and baseline + floor, as (name, baseline ms, ms, change)
+    regressions = []
+    for name, milliseconds in metrics.items():
+        reference = baseline.get(name)
+        if reference is None or reference <= 0:
+            continue
+        change = milliseconds / reference - 1.0
+        if change > threshold and milliseconds - reference > floor:
+            regressions.append((name, reference, milliseconds, change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation benchmark suite with JSON regression baselines")
+    parser.add_argument('--scenes', nargs='+', choices=list(SCENES), default=list(SCENES))
+    parser.add_argument('--ticks', type=int, default=600, help="timed ticks per scene")
+    parser.add_argument('--repeats', type=int, default=20, help="repeats of load_obj and scene init")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default='benchmarks/baselines/local.json')
+    parser.add_argument('--rounds', type=int, default=3, help="runs of the suite, each metric keeps its best")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument('--floor', type=float, default=0.01, help="slowdowns under this many ms are ignored")
+    parser.add_argument('--save', action='store_true', help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    metrics = best_of(args.rounds, args.scenes, args.ticks, args.repeats, args.seed)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['metrics']
+
+    print(f"{'metric':28} {'ms':>9} {'baseline':>9} {'change':>8}")
+    for name, milliseconds in metrics.items():
+        if name in baseline:
+            print(f"{name:28} {milliseconds:9.3f} {baseline[name]:9.3f} {milliseconds / baseline[name] - 1.0:+8.1%}")
+        else:
+            print(f"{name:28} {milliseconds:9.3f}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as file:
+            json.dump({"machine": {"platform": platform.platform(), "processor": platform.processor(),
+                                   "python": platform.python_version(), "numpy": np.__version__},
+                       "settings": {"scenes": {name: SCENES[name] for name in args.scenes}, "ticks": args.ticks,
+                                    "repeats": args.repeats, "rounds": args.rounds, "seed": args.seed},
+                       "metrics": metrics}, file, indent=2)
+        print(f"Saved {len(metrics)} metrics to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}, record one with --save")
+        return 0
+
+    regressions = compare(metrics, baseline, args.threshold, args.floor)
+    for name, reference, milliseconds, change in regressions:
+        print(f"REGRESSION {name}: {reference:.3f} ms -> {milliseconds:.3f} ms ({change:+.1%})")
+    print(f"{len(regressions)} of {len(metrics)} metrics regressed by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
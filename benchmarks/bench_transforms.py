@@ -0,0 +1,80 @@
+# Compares building model matrices one object at a time (the original Object.Draw code) against the batched
+# EntityStore.ModelMatrices(), with every transform changed and with all entities static.
+# Run from anywhere: python benchmarks/bench_transforms.py [repeats]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.entities import EntityStore
+
+sizes = [100, 1000, 10000]
+
+def model_matrix_per_object(position, rotation, scale):
+    # The original per-object code, kept as the reference implementation
+    translation_matrix = np.array([[1,0,0, position[0]],
+                                [0,1,0, position[1]],
+                                [0,0,1, position[2]],
+                                [0,0,0,1]], dtype = np.float32)
+    rotation_z_matrix = np.array([
+                                [np.cos(rotation[2]), -np.sin(rotation[2]), 0, 0],
+                                [np.sin(rotation[2]), np.cos(rotation[2]), 0, 0],
+                                [0, 0, 1, 0],
+                                [0, 0, 0, 1]
+                            ], dtype=np.float32)
+    rotation_x_matrix = np.array([
+                                [1, 0, 0, 0],
+                                [0, np.cos(rotation[0]), -np.sin(rotation[0]), 0],
+                                [0, np.sin(rotation[0]), np.cos(rotation[0]), 0],
+                                [0, 0, 0, 1]
+                            ], dtype=np.float32)
+    rotation_y_matrix = np.array([
+                                [np.cos(rotation[1]), 0, np.sin(rotation[1]), 0],
+                                [0, 1, 0, 0],
+                                [-np.sin(rotation[1]), 0, np.cos(rotation[1]), 0],
+                                [0, 0, 0, 1]
+                            ], dtype=np.float32)
+    scale_matrix = np.array([[scale[0], 0,0,0],
+                            [0,scale[1],0,0],
+                            [0,0,scale[2],0],
+                            [0,0,0,1]], dtype = np.float32)
+    return translation_matrix @ (rotation_z_matrix @ rotation_y_matrix @ rotation_x_matrix) @ scale_matrix
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+def main(repeats):
+    rng = np.random.default_rng(0)
+    print(f"{'entities':>8}{'per object (us)':>17}{'batched, all moved (us)':>25}{'batched, static (us)':>22}{'speedup':>9}")
+    for size in sizes:
+        store = EntityStore(capacity=size)
+        for _ in range(size):
+            store.Spawn(0, rng.uniform(-500, 500, 3), rng.uniform(-np.pi, np.pi, 3), rng.uniform(0.5, 2.0, 3))
+        rows = np.arange(size)
+
+        def per_object():
+            return [model_matrix_per_object(store.position[row], store.rotation[row], store.scale[row]) for row in rows]
+
+        def moved():
+            store.rotation[:size] += 0.01
+            store.ModelMatrices(rows)
+
+        expected = np.array(per_object())
+        assert np.allclose(store.ModelMatrices(rows), expected, atol=1e-4), size
+
+        perObject = timed(per_object, max(1, repeats // 10 if size >= 10000 else repeats))
+        allMoved = timed(moved, repeats)
+        static = timed(lambda: store.ModelMatrices(rows), repeats)
+        print(f"{size:>8}{perObject / size * 1e6:17.2f}{allMoved / size * 1e6:25.3f}{static / size * 1e6:22.3f}"
+              f"{perObject / allMoved:8.0f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,83 @@
+# Restarts the game scene many times in a hidden window and checks that the number of live GL objects (programs, shaders,
+# buffers, vertex arrays, probed with glIs*) stays the same from one restart to the next, then that releasing the scene
+# and clearing the GPU resource manager leaves none behind. Exits with status 1 otherwise.
+# Optional smoke check on a real driver, it needs a display: the same leak checks run headless against a fake GL in
+# tests/test_gpu_resources.py. Run from anywhere: python benchmarks/check_gpu_resources.py [restarts]
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glfw
+from OpenGL.GL import *
+from game import Game
+from utils.graphics import gpuResources
+
+WIDTH, HEIGHT = 320, 240
+NAMES = 2048 # GL object names probed, far above what the game uses
+keys = ["1", "W", "S", "A", "D", "Q", "E", "SPACE", "L_SHIFT", "R_CLICK", "L_CLICK"]
+
+def hidden_window():
+    glfw.init()
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, GL_TRUE)
+    glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+    window = glfw.create_window(WIDTH, HEIGHT, "GPU resources", None, None)
+    if not window:
+        glfw.terminate()
+        sys.exit("Glfw window can't be created")
+    glfw.make_context_current(window)
+    glEnable(GL_DEPTH_TEST)
+    return window
+
+def gl_object_counts():
+    return {
+        'programs': sum(bool(glIsProgram(name)) for name in range(1, NAMES)),
+        'shaders': sum(bool(glIsShader(name)) for name in range(1, NAMES)),
+        'buffers': sum(bool(glIsBuffer(name)) for name in range(1, NAMES)),
+        'vertex arrays': sum(bool(glIsVertexArray(name)) for name in range(1, NAMES)),
+    }
+
+def play(game, frames):
+    # A few frames of flying and firing, so that lasers and every level of detail get drawn
+    inputs = {key: False for key in keys}
+    inputs.update({"mouseDelta": [0.0, 0.0], "SPACE": True, "L_CLICK": True, "R_CLICK": True})
+    for frame in range(frames):
+        game.ProcessFrame(inputs, {"currentTime": frame / 60.0, "deltaTime": 1 / 60.0})
+
+def main(restarts=100, frames=3):
+    window = hidden_window()
+    game = Game(HEIGHT, WIDTH, None)
+    history = []
+    for restart in range(restarts + 1):
+        game.screen = 1
+        game.InitScene(seed=restart)
+        play(game, frames)
+        history.append(gl_object_counts())
+
+    print(f"{'restart':>8}" + "".join(f"{kind:>15}" for kind in history[0]))
+    for restart in sorted({0, 1, restarts // 2, restarts}):
+        print(f"{restart:>8}" + "".join(f"{count:>15}" for count in history[restart].values()))
+    print("Resources held by the manager:", gpuResources.Counts())
+    changed = [restart for restart, counts in enumerate(history) if counts != history[0]]
+
+    game.ReleaseScene()
+    gpuResources.Clear()
+    left = {kind: count for kind, count in gl_object_counts().items() if count}
+    glfw.destroy_window(window)
+    glfw.terminate()
+
+    if changed:
+        print(f"GL object counts changed on {len(changed)} of {restarts} restarts (first at restart {changed[0]})")
+    if left:
+        print(f"GL objects left after releasing everything: {left}")
+    if changed or left:
+        return 1
+    print(f"GL object counts constant over {restarts} restarts, nothing left after release")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
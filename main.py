@@ -1,19 +1,46 @@
+from utils.startup import startupProfile
 from OpenGL.GL import *
 from utils.window_manager import Window
 from game import Game
+from utils.graphics import gpuResources
+from utils.program_cache import programCache
+from utils.profiler import frameProfiler, frameCounters
+from utils.input_log import InputRecorder, InputReplay
+from assets.objects.objects import assets
 import imgui
+import argparse
+
+startupProfile.Mark('imports')
 
 class App:
-    def __init__(self):
+    def __init__(self, record=None, replay=None):
         self.window = Window()
-        self.game = Game(self.window.windowHeight, self.window.windowWidth, self.window.impl)
+        startupProfile.Mark('window')
+        # A replayed game runs at the tick rate it was recorded at
+        self.game = Game(self.window.windowHeight, self.window.windowWidth, self.window.impl,
+                         tickRate=replay.tickRate if replay is not None else 60)
+        startupProfile.Mark('game')
+        self.first_frame = True
+        self.first_game = True
         self.show_main_menu = True
         self.show_game_over = False
         self.show_you_won = False
+        self.profiler_key = False
+        self.record_path = record # Every game is recorded to this log, the last one played is kept
+        self.recorder = InputRecorder()
+        self.replay = replay
+        if replay is not None:
+            self.StartReplay()
 
     def RenderLoop(self):
         while self.window.IsOpen():
-            inputs, time = self.window.StartFrame(0.0, 0.0, 0.0, 1.0)
+            with frameProfiler.Scope('StartFrame'):
+                inputs, time = self.window.StartFrame(0.0, 0.0, 0.0, 1.0)
+
+            # F1 switches the frame profiler on and off
+            if inputs["F1"] and not self.profiler_key:
+                frameProfiler.Enable(not frameProfiler.enabled)
+            self.profiler_key = inputs["F1"]
             
             # Check if game changed to game over or win state
             if self.game.screen == 3 and not self.show_game_over:
@@ -27,14 +54,74 @@ class App:
                 self.DrawGameOverScreen()
             elif self.show_you_won:
                 self.DrawYouWonScreen()
+            elif self.replay is not None and self.replay.Done():
+                # Checked before Next(), a log can end before its first frame (recording stopped straight away)
+                self.FinishReplay()
             else:
+                if self.replay is not None:
+                    self.replay.Wait()
+                    inputs, time = self.replay.Next()
                 self.game.ProcessFrame(inputs, time)
+                self.recorder.Record(inputs, time)
+                if frameProfiler.enabled:
+                    self.DrawProfiler()
+                if self.game.screen != 1:
+                    self.StopRecording()
+                if self.replay is not None and self.game.screen != 1:
+                    self.FinishReplay()
             
-            self.window.EndFrame()
+            with frameProfiler.Scope('swap_buffers'):
+                self.window.EndFrame()
+            frameCounters.EndFrame()
+            frameProfiler.EndFrame()
+
+            if self.first_frame:
+                self.first_frame = False
+                startupProfile.Mark('first frame')
+                startupProfile.Report(assets)
         
+        self.StopRecording()
+        frameCounters.Report()
+        programCache.Report()
+        # GL objects are freed while the context still exists, in a fixed order
+        self.game.ReleaseScene()
+        gpuResources.Clear()
         self.window.Close()
 
+    def StopRecording(self):
+        if self.recorder.recording:
+            frames = self.recorder.Stop(self.record_path, self.game.simulation.Digest())
+            print(f"Recorded {frames} frames of game {self.game.seed} to {self.record_path}")
+
+    def StartReplay(self):
+        # Straight into the recorded game, without the main menu
+        self.show_main_menu = False
+        self.game.screen = 1
+        self.game.InitScene(seed=self.replay.seed)
+        if not self.replay.realTime:
+            self.window.SetSwapInterval(0)
+        self.replay.Rewind()
+
+    def FinishReplay(self):
+        # The log ran out (or the game ended early): compare with the recorded final state and quit
+        matches = self.game.simulation.Digest() == self.replay.digest
+        print(f"Replayed {self.replay.frame} of {len(self.replay)} frames in {self.replay.Elapsed():.2f} s "
+              f"({self.replay.currentTime:.2f} s recorded), final state {'matches' if matches else 'DIFFERS FROM'} the recording")
+        self.replay = None
+        self.window.shouldClose = True
+
+    def DrawProfiler(self):
+        imgui.new_frame()
+        frameProfiler.DrawOverlay()
+        imgui.render()
+        self.window.impl.render(imgui.get_draw_data())
+
     def DrawMainMenu(self):
+        # Load the models in the background while the menu is up, New Game only waits if they are not ready yet. Shader
+        # programs and meshes are warmed up meanwhile, so the first game frame does not stall on them.
+        assets.Prefetch()
+        self.game.WarmUp()
+
         window_w, window_h = 400, 200  # Set the window size
         x_pos = (self.window.windowWidth - window_w) / 2
         y_pos = (self.window.windowHeight - window_h) / 2
@@ -51,6 +138,12 @@ class App:
             self.show_main_menu = False
             self.game.screen = 1
             self.game.InitScene()
+            if self.record_path is not None:
+                self.recorder.Start(self.game.seed, self.game.timestep.tickRate)
+            if self.first_game:
+                self.first_game = False
+                startupProfile.Mark('new game')
+                startupProfile.Report(assets)
 
         imgui.end()
 
@@ -137,5 +230,10 @@ class App:
         self.window.impl.render(imgui.get_draw_data())
 
 if __name__ == "__main__":
-    app = App()
+    parser = argparse.ArgumentParser(description="Space Heist")
+    parser.add_argument('--record', metavar='LOG', help="record the seed and inputs of each game to LOG")
+    parser.add_argument('--replay', metavar='LOG', help="play back a recorded game instead of showing the main menu")
+    parser.add_argument('--fast', action='store_true', help="replay as fast as possible instead of in real time")
+    args = parser.parse_args()
+    app = App(record=args.record, replay=InputReplay(args.replay, realTime=not args.fast) if args.replay else None)
     app.RenderLoop()
\ No newline at end of file
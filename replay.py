@@ -0,0 +1,62 @@
+import argparse
+import sys
+import time
+from simulation import Simulation, PLAYING, WON, LOST
+from utils.timestep import FixedTimestep
+from utils.input_log import InputReplay
+from utils.profiler import frameProfiler
+
+###############################################################
+# Headless replay
+#
+# Runs an input log (recorded with python main.py --record game.log) through the simulation without a window and as
+# fast as possible: every recorded frame runs the ticks Game.UpdateScene would run for it. The final state is checked
+# against the digest in the log, and the replay speed is reported, so recorded games double as realistic workloads.
+#   python replay.py game.log --repeat 10 --profile
+# To watch a log in the game instead: python main.py --replay game.log [--fast]
+
+def replay(log, simulation=None):
+    # Plays the whole log from the start, returns the simulation in its final state
+    simulation = simulation or Simulation(log.tickRate)
+    simulation.Reset(log.seed)
+    timestep = FixedTimestep(log.tickRate)
+    log.Rewind()
+    while not log.Done():
+        inputs, time = log.Next()
+        with frameProfiler.Scope('UpdateScene'):
+            for _ in range(timestep.Advance(time["deltaTime"])):
+                simulation.Step(inputs)
+        frameProfiler.EndFrame()
+    return simulation
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an input log headless and check its final state")
+    parser.add_argument('log')
+    parser.add_argument('--repeat', type=int, default=1, help="number of times to play the log")
+    parser.add_argument('--profile', action='store_true', help="print the time per frame of the update sections")
+    args = parser.parse_args()
+
+    log = InputReplay(args.log)
+    frameProfiler.Reset(frames=len(log) * args.repeat)
+    frameProfiler.Enable(args.profile)
+    simulation = Simulation(log.tickRate)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        replay(log, simulation)
+    elapsed = time.perf_counter() - start
+
+    status = {PLAYING: "still playing", WON: "won", LOST: "lost"}[simulation.status]
+    print(f"{len(log)} frames, {simulation.ticks} ticks at {log.tickRate} Hz, seed {log.seed}: {status}")
+    print(f"{args.repeat} replays in {elapsed:.2f} s: {simulation.ticks * args.repeat / elapsed:.0f} ticks/s, "
+          f"{simulation.ticks / log.tickRate * args.repeat / elapsed:.0f}x real time")
+    for name, depth, mean, p50, p95, p99, peak in frameProfiler.Stats():
+        print(f"{'  ' * depth + name:16} mean {mean:7.3f} ms  p50 {p50:7.3f}  p95 {p95:7.3f}  p99 {p99:7.3f}  max {peak:7.3f}")
+
+    if simulation.Digest() != log.digest:
+        print("MISMATCH: the replay did not end in the recorded state")
+        return 1
+    print("Final state matches the recording")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+import functools
+import hashlib
+import numpy as np
+from utils.entities import EntityStore
+from utils.steering import steer_pirates, facing_rotations
+from utils.spatial_hash import pairs_within
+from utils.collision import swept_sphere_hits, first_hits
+from utils.projectiles import ProjectilePool
+from utils.transforms import TRANSFORM_KEYS, model_matrices, interpolate_transforms, norms
+from utils.profiler import frameProfiler
+from assets.objects.objects import transporterProps, pirateProps, planetProps, spacestationProps
+
+###############################################################
+# Headless game simulation
+#
+# The world state and everything that happens to it in a tick, without GLFW or OpenGL. Reset() builds a world and
+# Step() advances it by one fixed tick from a dict of inputs (the keys Window.StartFrame() reports), so a game can be
+# driven by any input stream, much faster than real time. Nothing here draws: Game renders the state of a Simulation
+# and the HUD, and the simulation runs the same without it.
+
+# Entity types of the EntityStore
+PLANET, SPACE_STATION, PIRATE = range(3)
+
+# Game status, the values are the Game screens that show it
+PLAYING, WON, LOST = 1, 2, 3
+
+LASER_CAPACITY = 512 # Lasers alive at once, the oldest makes room for a new one
+
+# Model space forward axis, and the quarter turn about y that maps it to the direction the transporter flies in
+FORWARD = np.array([0, 0, -1], dtype=np.float32)
+ROTATION_90_Y = np.array([
+    [0, 0, -1],
+    [0, 1, 0],
+    [1, 0, 0]
+], dtype=np.float32)
+
+class Simulation:
+    def __init__(self, tickRate=60):
+        self.tickTime = 1.0 / tickRate
+        self.max_speed = 10.0
+        self.acceleration = 6.0  # Speed gained per second while accelerating
+        self.rotation_speed = 1.5  # Radians per second
+        self.laser_cooldown_time = 0.3  # Cooldown period between shots
+        self.laser_speed = 5.0
+        self.laser_time_to_live = 10.0  # Seconds before a laser that hit nothing despawns
+        self.max_laser_distance = 500.0  # Lasers farther than this from the transporter despawn
+        self.pirate_speed = 5.0
+        self.n_planets = 20
+        self.n_spaceStations = 20
+        self.n_pirates = 20
+        self.entities = EntityStore() # Planets, space stations and pirates
+        self.lasers = ProjectilePool(capacity=LASER_CAPACITY)  # Store active lasers
+        self.status = None
+
+    def Reset(self, seed=None):
+        # Builds a new world. The layout is drawn from np.random, or from its own generator if a seed is given.
+        rng = np.random if seed is None else np.random.RandomState(seed)
+        self.entities.Clear()
+        self.lasers.Clear()
+        self.ticks = 0
+        self.status = PLAYING
+        self.transporter_speed = 0.0
+        self.view_mode = 1  # 1: 3rd person, 2: 1st person
+        self.laser_cooldown = 0.0  # Time until next laser can be fired
+
+        # Define world boundaries
+        self.worldMin = np.array([-500, -500, -500], dtype=np.float32)
+        self.worldMax = np.array([500, 500, 500], dtype=np.float32)
+        # Broadphase for all proximity queries: pairs within a distance through a uniform grid over the world cube
+        self.broadphase = functools.partial(pairs_within, worldMin=self.worldMin, worldMax=self.worldMax)
+
+        # Planets and space stations, randomly placed within world bounds. Each space station revolves around the
+        # planet it is anchored to: the first n_planets stations get a planet each, any more are shared out over the
+        # planets in turn.
+        planets, spaceStations = [], []
+        stationOffset = np.array([0, 0, 10], dtype=np.float32)
+        for index in range(self.n_planets):
+            position = rng.uniform(self.worldMin, self.worldMax)
+            planets.append(self.SpawnEntity(PLANET, planetProps, position))
+            if index < self.n_spaceStations:
+                spaceStations.append(self.SpawnEntity(SPACE_STATION, spacestationProps, position + stationOffset, anchor=planets[-1]))
+
+        planets.append(self.SpawnEntity(PLANET, planetProps, np.array([0, -15, 0], dtype=np.float32)))
+        spaceStations.append(self.SpawnEntity(SPACE_STATION, spacestationProps, np.array([0, -15, 10], dtype=np.float32), anchor=planets[-1]))
+        for index in range(self.n_planets, self.n_spaceStations):
+            planet = planets[index % len(planets)]
+            position = self.entities.position[self.entities.Row(planet)] + stationOffset
+            spaceStations.append(self.SpawnEntity(SPACE_STATION, spacestationProps, position, anchor=planet))
+
+        self.destination = spaceStations[rng.randint(0, len(spaceStations))]
+        self.entities.colour[self.entities.Row(self.destination)] = np.array([1.0, 0.8, 0.2, 1.0], dtype=np.float32)  # Make it golden
+
+        # Transporter. The start planet is still drawn (the transporter starts near the origin for now) so that the
+        # rest of the layout stays the same for a given seed.
+        start_planet = rng.choice(planets)
+        self.transporter = {key: np.array(transporterProps[key], dtype=np.float64) for key in TRANSFORM_KEYS}
+        self.transporter['position'][...] = np.array([-1, -1, -1], dtype=np.float32)
+
+        # Pirates, spawned at random locations within world bounds
+        for _ in range(self.n_pirates):
+            position = rng.uniform(self.worldMin, self.worldMax)
+            self.SpawnEntity(PIRATE, pirateProps, position)
+
+        # The 1st person camera is where lasers are fired from
+        self.cameraPosition = np.array([-15/1.5,-1,4/1.5], dtype=np.float32)
+        self.cameraLookAt = np.array([1,0,0], dtype=np.float32)
+        self.SaveState()
+
+    def SpawnEntity(self, entityType, properties, position, **components):
+        return self.entities.Spawn(entityType, position, properties['rotation'], properties['scale'], properties['colour'], **components)
+
+    def SaveState(self):
+        # Called before every tick, the state drawn at alpha 0
+        self.entities.SaveTransforms()
+        self.lasers.SavePositions()
+        self.previousTransporter = np.concatenate([self.transporter[key] for key in TRANSFORM_KEYS])
+        self.previousCamera = (np.copy(self.cameraPosition), np.copy(self.cameraLookAt))
+
+    def Run(self, inputStream, observer=None):
+        # Steps through an iterable of input dicts, one per tick, until it runs out or the game is over, calling
+        # observer(simulation) after every tick. Returns the number of ticks run.
+        ticks = 0
+        for inputs in inputStream:
+            if not self.Step(inputs):
+                break
+            ticks += 1
+            if observer is not None:
+                observer(self)
+        return ticks
+
+    def Step(self, inputs):
+        # One tick. Returns False without doing anything once the game is over.
+        if self.status != PLAYING:
+            return False
+        self.SaveState()
+        currentTime, deltaTime = self.ticks * self.tickTime, self.tickTime
+        self.ticks += 1
+
+        ############################################################################
+        # Manage inputs
+        frameProfiler.Begin('input')
+        transporter = self.transporter
+
+        # Handle view mode switching
+        if inputs["R_CLICK"]:
+            self.view_mode = 2  # 1st person view when right-click is held
+        else:
+            self.view_mode = 1  # 3rd person view by default
+
+        # Update laser cooldown timer
+        if self.laser_cooldown > 0:
+            self.laser_cooldown -= deltaTime
+
+        # Handle input based on view mode
+        if self.view_mode == 1:  # 3rd person view: can maneuver transporter
+            rotation_speed = self.rotation_speed * deltaTime
+            if inputs["W"]:
+                transporter['rotation'][0] -= rotation_speed  # Pitch down
+            if inputs["S"]:
+                transporter['rotation'][0] += rotation_speed  # Pitch up
+            if inputs["A"]:
+                transporter['rotation'][1] -= rotation_speed  # Yaw left
+            if inputs["D"]:
+                transporter['rotation'][1] += rotation_speed  # Yaw right
+            if inputs["Q"]:
+                transporter['rotation'][2] -= rotation_speed  # Roll left
+            if inputs["E"]:
+                transporter['rotation'][2] += rotation_speed  # Roll right
+            if inputs["SPACE"]:
+                self.transporter_speed += self.acceleration * deltaTime  # Accelerate forward
+                if self.transporter_speed > self.max_speed:
+                    self.transporter_speed = self.max_speed
+
+        elif self.view_mode == 2:  # 1st person view: can shoot lasers
+            # Fire laser with left click if cooldown is over
+            if inputs["L_CLICK"] and self.laser_cooldown <= 0:
+                forward_dir = self.cameraLookAt - self.cameraPosition
+                # Spawn a laser at the transporter's position, with the same rotation as the transporter, moving
+                # against forward_dir, and remember its creation time
+                self.lasers.Spawn(self.cameraPosition + 2*forward_dir,
+                                  velocity=-forward_dir * self.laser_speed,
+                                  rotation=transporter['rotation'],
+                                  colour=np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32),
+                                  spawnTime=currentTime)
+                # Set cooldown
+                self.laser_cooldown = self.laser_cooldown_time
+        frameProfiler.End()
+
+        # Calculate forward direction
+        frameProfiler.Begin('transporter')
+        (cx, cy, cz), (sx, sy, sz) = np.cos(transporter['rotation']), np.sin(transporter['rotation'])
+        rotation_matrix = np.array([
+            [cy * cx, sz * sy * cx - cz * sx, cz * sy * cx + sz * sx],
+            [cy * sx, sz * sy * sx + cz * cx, cz * sy * sx - sz * cx],
+            [-sy, sz * cy, cz * cy]
+        ], dtype=np.float32)
+        forward_direction = rotation_matrix @ FORWARD
+        # Rotate forward direction by 90 degrees about the y-axis
+        forward_direction = ROTATION_90_Y @ forward_direction
+        ############################################################################
+        # Update transporter (Update velocity, position, and check for collisions)
+        transporter['position'] += forward_direction * self.transporter_speed * deltaTime
+
+        # Check collision with destination spacestation
+        entities = self.entities
+        dist_to_destination = norms(transporter['position'] - entities.position[entities.Row(self.destination)])
+        if dist_to_destination < 5.0:  # Collision threshold
+            self.status = WON
+        frameProfiler.End()
+
+        ############################################################################
+        # Update spacestations (Update velocity and position to revolve around respective planet)
+        frameProfiler.Begin('stations')
+        spaceStations = entities.Rows(SPACE_STATION)
+        planets = entities.Derived('station planets', lambda: entities.RowsOf(entities.anchor[spaceStations]))
+        angle = currentTime * 0.5  # Adjust the speed of revolution as needed
+        radius = 10.0  # Adjust the radius of revolution as needed
+        entities.position[spaceStations] = entities.position[planets] + np.array([
+            radius * np.cos(angle),
+            radius * np.sin(angle),
+            0
+        ], dtype=np.float32)
+        frameProfiler.End()
+
+        ############################################################################
+        # Update Lasers (Update position of any currently shot lasers, make sure to despawn them if they go too far to save computation)
+        frameProfiler.Begin('lasers')
+        lasers = self.lasers
+        # Move lasers forward
+        lasers.Advance(deltaTime)
+        laser_starts = lasers.previousPosition[:lasers.count]
+        # Despawn lasers that are too old or have traveled too far
+        laser_alive = ~lasers.Expired(currentTime, self.laser_time_to_live, transporter['position'], self.max_laser_distance)
+
+        # Check for collisions with pirates along the whole path each laser covered this tick, so that lasers
+        # cannot pass through pirates at low tick rates. Each laser destroys the first pirate it reaches.
+        pirates = entities.Rows(PIRATE)
+        if lasers.count and len(pirates):
+            hitLasers, hitPirates = first_hits(*swept_sphere_hits(laser_starts, lasers.position[:lasers.count], entities.position[pirates],
+                                                                  3.0, pairs=self.broadphase))  # Collision threshold
+            if len(hitPirates):
+                entities.alive[pirates[hitPirates]] = False
+                laser_alive[hitLasers] = False
+                entities.DespawnDead()
+        lasers.Keep(laser_alive)
+        frameProfiler.End()
+
+        ############################################################################
+        # Update Pirates (Write logic to update their velocity based on transporter position, and check for collision with laser or transporter)
+        frameProfiler.Begin('pirates')
+        collision_distance_transporter = 3.0  # Collision distance for transporter
+        collision_distance_objects = 5.0  # Collision distance for other objects
+
+        # Pursue the transporter while avoiding other pirates, planets and spacestations (see utils/steering.py)
+        pirates = entities.Rows(PIRATE)
+        if len(pirates):
+            directions, distances = steer_pirates(entities.position[pirates], transporter['position'],
+                                                  entities.position[entities.Rows(PLANET)],
+                                                  entities.position[entities.Rows(SPACE_STATION)],
+                                                  separation=collision_distance_objects, pairs=self.broadphase)
+
+            # Check collision with transporter
+            caught = np.flatnonzero(distances < collision_distance_transporter)
+            if len(caught):
+                # Collision detected - Game Over! Pirates after the first one that got there stay put this tick
+                self.status = LOST
+                pirates, directions = pirates[:caught.min()], directions[:caught.min()]
+
+            # Update pirate positions
+            entities.position[pirates] += directions * self.pirate_speed * deltaTime
+
+            # Make pirates face the direction they're moving
+            moving = np.any(directions != 0, axis=1)
+            pitch, yaw = facing_rotations(directions[moving])
+            entities.rotation[pirates[moving], 0] = pitch
+            entities.rotation[pirates[moving], 1] = yaw
+        frameProfiler.End()
+
+        ############################################################################
+        # Update Camera (Check for view (3rd person or 1st person) and set position and LookAt accordingly)
+        frameProfiler.Begin('camera')
+        self.cameraLookAt = forward_direction
+        if self.view_mode == 1:  # 3rd person view: behind and above the transporter
+            self.cameraPosition = transporter['position'] - 10 * forward_direction + np.array([0, 0, 5], dtype=np.float32)
+        else: # 1st person view: at the transporter, looking the way it faces
+            self.cameraPosition = transporter['position'] + forward_direction * 5
+        frameProfiler.End()
+        return True
+
+    def TransporterMatrix(self, alpha=1.0):
+        # Model matrix of the transporter between the start (alpha 0) and the end (alpha 1) of the last tick
+        transform = np.concatenate([self.transporter[key] for key in TRANSFORM_KEYS])[np.newaxis]
+        if alpha < 1.0:
+            transform = interpolate_transforms(self.previousTransporter[np.newaxis], transform, alpha)
+        return model_matrices(transform[:, 0:3], transform[:, 3:6], transform[:, 6:9])[0]
+
+    def CameraPose(self, alpha=1.0):
+        # Camera position and look direction between the start (alpha 0) and the end (alpha 1) of the last tick
+        if alpha >= 1.0:
+            return self.cameraPosition, self.cameraLookAt
+        previousPosition, previousLookAt = self.previousCamera
+        return (previousPosition + alpha * (self.cameraPosition - previousPosition),
+                previousLookAt + alpha * (self.cameraLookAt - previousLookAt))
+
+    def Digest(self):
+        # SHA-1 of the whole game state: two simulations have the same digest only if they are bit for bit in the same
+        # state, e.g. a game and its replay (see utils/input_log.py). Anchors are hashed as the rows they point to,
+        # handles also carry slot generations that depend on the games played before.
+        digest = hashlib.sha1()
+        digest.update(np.array([self.ticks, self.status, self.view_mode], dtype=np.int64).tobytes())
+        digest.update(np.array([self.transporter_speed, self.laser_cooldown], dtype=np.float64).tobytes())
+        for key in TRANSFORM_KEYS:
+            digest.update(self.transporter[key].tobytes())
+        digest.update(self.cameraPosition.tobytes())
+        digest.update(self.cameraLookAt.tobytes())
+        entities = self.entities
+        for store, columns in ((entities, ('transform', 'velocity', 'colour', 'alive', 'type', 'spawnTime')),
+                               (self.lasers, self.lasers.Columns())):
+            for name in columns:
+                digest.update(np.ascontiguousarray(getattr(store, name)[:store.count]).tobytes())
+        digest.update(entities.RowsOf(entities.anchor[:entities.count]).tobytes())
+        return digest.digest()
@@ -0,0 +1,131 @@
+# GpuResources reference counting, and scene restarts leaving the number of live GL objects unchanged, run against a
+# fake GL that only hands out and takes back object names (benchmarks/check_gpu_resources.py does the same on a real
+# driver). Run from the repository root: python -m pytest tests
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pytest
+import utils.graphics as graphics
+import game
+from utils.graphics import GpuResources
+
+class FakeGL:
+    # Live buffer, vertex array and program names, and the deletes of names that were not live. Every other GL call does
+    # nothing and returns None.
+    def __init__(self):
+        self.live = {'buffer': set(), 'vertex array': set(), 'program': set()}
+        self.nextName = 1
+        self.badDeletes = []
+
+    def Create(self, kind):
+        name = self.nextName
+        self.nextName += 1
+        self.live[kind].add(name)
+        return name
+
+    def Delete(self, kind, names):
+        for name in names:
+            if name in self.live[kind]:
+                self.live[kind].remove(name)
+            else:
+                self.badDeletes.append((kind, name))
+
+    def Counts(self):
+        return {kind: len(names) for kind, names in self.live.items()}
+
+    def glGenBuffers(self, count):
+        return self.Create('buffer')
+
+    def glDeleteBuffers(self, count, names):
+        self.Delete('buffer', names)
+
+    def glGenVertexArrays(self, count):
+        return self.Create('vertex array')
+
+    def glDeleteVertexArrays(self, count, names):
+        self.Delete('vertex array', names)
+
+    def glDeleteProgram(self, program):
+        self.Delete('program', (program,))
+
+    def glGetProgramiv(self, program, parameter):
+        return 0 # No active uniforms
+
+    def glGetUniformBlockIndex(self, program, name):
+        return graphics.GL_INVALID_INDEX
+
+    def Load(self, vertexSource, fragmentSource):
+        # Stands in for the program cache
+        return self.Create('program')
+
+    def Ignore(self, *args):
+        return None
+
+@pytest.fixture
+def fakeGL(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    gl = FakeGL()
+    for module in (graphics, game):
+        for name, value in list(vars(module).items()):
+            if name.startswith('gl') and callable(value):
+                monkeypatch.setattr(module, name, getattr(gl, name, gl.Ignore))
+    monkeypatch.setattr(graphics, 'programCache', gl)
+    resources = GpuResources()
+    monkeypatch.setattr(graphics, 'gpuResources', resources)
+    monkeypatch.setattr(game, 'gpuResources', resources)
+    return gl
+
+def mesh_properties():
+    return {'vertices': np.zeros((3, 3), dtype=np.float32), 'indices': np.arange(3, dtype=np.uint16)}
+
+def test_shared_by_reference_count(fakeGL):
+    resources = graphics.gpuResources
+    first, second = resources.Mesh('a', mesh_properties()), resources.Mesh('a', mesh_properties())
+    assert first is second and first.refCount == 2
+    assert fakeGL.Counts() == {'buffer': 2, 'vertex array': 1, 'program': 0}
+
+    resources.Release(first)
+    resources.Collect()
+    assert resources.Counts() == {'mesh': 1}
+    resources.Release(second)
+    assert resources.Counts() == {'mesh': 1} # Unreferenced, but resident until Collect()
+    resources.Collect()
+    assert resources.Counts() == {} and fakeGL.Counts() == {'buffer': 0, 'vertex array': 0, 'program': 0}
+    assert fakeGL.badDeletes == []
+
+def test_collect_deletes_batches_before_their_mesh(fakeGL):
+    resources = graphics.gpuResources
+    batch = resources.Batch('a', mesh_properties())
+    assert batch.mesh.refCount == 1
+    resources.Release(batch)
+    resources.Collect()
+    assert resources.Counts() == {}
+    assert fakeGL.Counts() == {'buffer': 0, 'vertex array': 0, 'program': 0} and fakeGL.badDeletes == []
+
+def test_clear_deletes_referenced_resources(fakeGL):
+    resources = graphics.gpuResources
+    resources.Program({'vertex_shader': 'v', 'fragment_shader': 'f'})
+    resources.Batch('a', mesh_properties())
+    resources.UniformBuffer('Camera', 144)
+    resources.Clear()
+    assert resources.Counts() == {}
+    assert fakeGL.Counts() == {'buffer': 0, 'vertex array': 0, 'program': 0} and fakeGL.badDeletes == []
+
+def test_restarts_do_not_leak(fakeGL):
+    scene = game.Game(240, 320, None)
+    counts = []
+    for restart in range(20):
+        scene.screen = 1
+        scene.InitScene(seed=restart)
+        counts.append((fakeGL.Counts(), graphics.gpuResources.Counts()))
+    assert all(count == counts[0] for count in counts), counts
+    assert counts[0][0]['program'] == 4
+
+    scene.ReleaseScene()
+    graphics.gpuResources.Clear()
+    assert fakeGL.Counts() == {'buffer': 0, 'vertex array': 0, 'program': 0}
+    assert graphics.gpuResources.Counts() == {} and fakeGL.badDeletes == []
@@ -0,0 +1,63 @@
+# parse_obj and load_obj against a plain per-line parser, on OBJ text with long indices and numbers, every corner form
+# and negative indices. Run from the repository root: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils.obj_loader import parse_obj, load_obj
+
+def parse_obj_lines(text):
+    # Reference: vectors and fan-triangulated [v, vt, vn] corners (-1 for a missing field), one line at a time
+    mesh = {'v': [], 'vt': [], 'vn': [], 'faces': []}
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] in ('v', 'vt', 'vn'):
+            width = 2 if parts[0] == 'vt' else 3
+            mesh[parts[0]].append([float(part) for part in parts[1:width + 1]])
+        elif parts[0] == 'f':
+            corners = []
+            for part in parts[1:]:
+                fields = (part.split('/') + ['', ''])[:3]
+                counts = (len(mesh['v']), len(mesh['vt']), len(mesh['vn']))
+                corners.append([-1 if not field else int(field) - 1 if int(field) > 0 else count + int(field)
+                                for field, count in zip(fields, counts)])
+            mesh['faces'] += [[corners[0], corners[j], corners[j + 1]] for j in range(1, len(corners) - 1)]
+    return {'v': np.array(mesh['v'], dtype=np.float32).reshape(-1, 3), 'vt': np.array(mesh['vt'], dtype=np.float32).reshape(-1, 2),
+            'vn': np.array(mesh['vn'], dtype=np.float32).reshape(-1, 3), 'faces': np.array(mesh['faces'], dtype=np.int32).reshape(-1, 3, 3)}
+
+def write_obj(tmp_path, text):
+    path = tmp_path / 'model.obj'
+    path.write_bytes(text.encode('ascii'))
+    return str(path)
+
+def assert_same_as_lines(tmp_path, text):
+    mesh, expected = parse_obj(write_obj(tmp_path, text)), parse_obj_lines(text)
+    for key in ('v', 'vt', 'vn', 'faces'):
+        assert mesh[key].dtype == expected[key].dtype, key
+        assert np.array_equal(mesh[key], expected[key]), key
+
+def test_long_indices(tmp_path):
+    text = 'v 0 0 0\nf 12345678 2 3\nf 123456789/2/3 987654321//4 5/6 7\nf 1 2 3 2000000000\n'
+    assert_same_as_lines(tmp_path, text)
+    assert parse_obj(write_obj(tmp_path, 'f 12345678 2 3\n'))['faces'][0].tolist() == [[12345677, -1, -1], [1, -1, -1], [2, -1, -1]]
+
+def test_long_and_short_numbers(tmp_path):
+    text = ('v -12.345678 0.5 .25\nv 1234567.1234567 -7 0.054669\r\nv 3 -1234567 9.99999999\nv 1e-3 -2.5E2 123456789012345678\n'
+            'vt 0.5 1\nvn 0 0 -1\n')
+    assert_same_as_lines(tmp_path, text)
+
+def test_corner_forms(tmp_path):
+    text = ('v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nvt 0 0\nvt 1 1\nvn 0 0 1\n'
+            'f 1 2 3\nf 1/1 2/2 3/1 4/2\nf 1//1 2//1 3//1\nf 1/1/1 2/2/1 3/1/1\nf -4 -3 -2 -1\nf 1/-2/-1 2/-1 3\n')
+    assert_same_as_lines(tmp_path, text)
+
+def test_load_obj(tmp_path):
+    text = 'v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3 4\n'
+    vertices, faces = load_obj(write_obj(tmp_path, text), [[1, 0, 0], [0, 1, 0]])
+    assert vertices.dtype == np.float32 and vertices.shape == (4, 6)
+    assert vertices[:, 3:].tolist() == [[1, 0, 0], [0, 1, 0], [1, 0, 0], [0, 1, 0]]
+    assert faces.dtype == np.int32 and faces.tolist() == [0, 1, 2, 0, 2, 3]
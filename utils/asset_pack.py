@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+from utils.obj_loader import load_obj
+from utils.lod import build_lods
+from utils.mesh_optimizer import optimize_mesh
+
+###############################################################
+# Binary asset pack
+#
+# Cooked meshes are stored in a single file so that the game does not re-parse the OBJ text on every start.
+# Layout (little endian):
+#   header : magic, version, index offset, index length (padded to ALIGNMENT bytes)
+#   data   : raw vertices / indices / bounds / sphere arrays, then vertices<n> / indices<n> of every level of detail n
+#            (see utils/lod.py), each starting on an ALIGNMENT byte boundary. Every level goes through the mesh
+#            optimization pass first (see utils/mesh_optimizer.py): positions only, uint16 indices where they fit.
+#   index  : utf-8 JSON table {name: {source stamp, colours, arrays: {key: {offset, dtype, shape}}}}
+# At runtime the file is memory-mapped and the arrays handed out are views into the mapping (no copy).
+
+PACK_MAGIC = b'SHPK'
+PACK_VERSION = 4
+HEADER_FORMAT = '<4sIQQ'
+ALIGNMENT = 16
+
+FRESH, RESTAMP, STALE = 0, 1, 2
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _file_hash(filepath):
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+def _source_stamp(filepath):
+    stat = os.stat(filepath)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha1': _file_hash(filepath)}
+
+def _colour_key(colors):
+    return [[float(c) for c in color] for color in colors]
+
+def _bounds(vertices):
+    positions = vertices[:, :3]
+    return np.array([positions.min(axis=0), positions.max(axis=0)], dtype=np.float32)
+
+def _bounding_sphere(vertices):
+    # [x, y, z, radius] around the centre of the bounding box, used for frustum culling (see utils/culling.py)
+    positions = vertices[:, :3].astype(np.float64)
+    centre = (positions.min(axis=0) + positions.max(axis=0)) / 2
+    radius = np.sqrt(((positions - centre) ** 2).sum(axis=1).max())
+    return np.append(centre, radius).astype(np.float32)
+
+def cook_pack(packPath, sources, meshes=None, loader=load_obj):
+    # sources: {name: (objPath, colors)}, meshes: optional {name: (vertices, indices)} that are already parsed
+    meshes = {} if meshes is None else meshes
+    os.makedirs(os.path.dirname(packPath) or '.', exist_ok=True)
+
+    index = {}
+    tmpPath = packPath + '.tmp'
+    with open(tmpPath, 'wb') as file:
+        offset = _align(struct.calcsize(HEADER_FORMAT))
+        file.write(b'\0' * offset)
+        for name, (filepath, colors) in sources.items():
+            if name in meshes:
+                vertices, indices = meshes[name]
+            else:
+                vertices, indices = loader(filepath, colors)
+            vertices, indices = optimize_mesh(vertices, indices)
+            arrays = {
+                'vertices': vertices,
+                'indices': indices,
+                'bounds': _bounds(vertices),
+                'sphere': _bounding_sphere(vertices)
+            }
+            for level, (levelVertices, levelIndices) in enumerate(build_lods(vertices, indices), 1):
+                arrays[f'vertices{level}'], arrays[f'indices{level}'] = optimize_mesh(levelVertices, levelIndices)
+            entry = {'source': filepath, 'colors': _colour_key(colors), 'arrays': {}}
+            entry.update(_source_stamp(filepath))
+            for key, array in arrays.items():
+                file.write(b'\0' * (_align(offset) - offset))
+                offset = _align(offset)
+                entry['arrays'][key] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+                file.write(array.tobytes())
+                offset += array.nbytes
+            index[name] = entry
+
+        indexBytes = json.dumps(index).encode('utf-8')
+        file.write(indexBytes)
+        file.seek(0)
+        file.write(struct.pack(HEADER_FORMAT, PACK_MAGIC, PACK_VERSION, offset, len(indexBytes)))
+    os.replace(tmpPath, packPath)
+
+class AssetPack:
+    def __init__(self, packPath):
+        self.path = packPath
+        self.data = np.memmap(packPath, dtype=np.uint8, mode='r')
+        magic, version, indexOffset, indexLength = struct.unpack_from(HEADER_FORMAT, self.data, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{packPath} is not a version {PACK_VERSION} asset pack")
+        self.index = json.loads(bytes(self.data[indexOffset:indexOffset + indexLength]).decode('utf-8'))
+
+    def Check(self, name, filepath, colors):
+        # FRESH: usable as is, RESTAMP: contents unchanged but mtime moved (e.g. after a checkout), STALE: must be re-cooked
+        entry = self.index.get(name)
+        if entry is None or entry['source'] != filepath or entry['colors'] != _colour_key(colors):
+            return STALE
+        stat = os.stat(filepath)
+        if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']:
+            return FRESH
+        if stat.st_size == entry['size'] and _file_hash(filepath) == entry['sha1']:
+            return RESTAMP
+        return STALE
+
+    def Get(self, name):
+        mesh = {}
+        for key, array in self.index[name]['arrays'].items():
+            dtype = np.dtype(array['dtype'])
+            count = int(np.prod(array['shape']))
+            start = array['offset']
+            mesh[key] = self.data[start:start + count * dtype.itemsize].view(dtype).reshape(array['shape'])
+        return mesh
+
+def load_meshes(sources, packPath, loader=load_obj):
+    # Returns {name: {'vertices', 'indices', 'bounds', 'sphere', 'vertices1', 'indices1', ...}} backed by the memory-mapped pack, cooking it first if needed
+    pack = None
+    if os.path.exists(packPath):
+        try:
+            pack = AssetPack(packPath)
+        except (OSError, ValueError, struct.error):
+            pack = None
+
+    states = {name: STALE if pack is None else pack.Check(name, filepath, colors) for name, (filepath, colors) in sources.items()}
+    if any(state != FRESH for state in states.values()):
+        # Copy out whatever is still valid before the old mapping is dropped and the file replaced
+        meshes = {}
+        for name, state in states.items():
+            if state != STALE:
+                mesh = pack.Get(name)
+                meshes[name] = (np.array(mesh['vertices']), np.array(mesh['indices']))
+        pack = None
+        cook_pack(packPath, sources, meshes, loader)
+        pack = AssetPack(packPath)
+
+    return {name: pack.Get(name) for name in sources}
@@ -0,0 +1,104 @@
+import threading
+import time
+
+###############################################################
+# Lazy asset registry
+#
+# Assets are registered with a loader function and only loaded on first use. Prefetch() loads everything that is still
+# pending on a background thread, and Get() blocks only if the asset it asks for is still being loaded.
+
+PENDING, LOADING, READY, FAILED = 0, 1, 2, 3
+
+class AssetRegistry:
+    def __init__(self):
+        self.loaders = {}
+        self.assets = {}
+        self.states = {}
+        self.errors = {}
+        self.timings = {} # name -> (thread name, start, end) in perf_counter seconds
+        self.waits = {} # name -> seconds the caller of Get() spent blocked on a background load
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def Register(self, name, loader):
+        with self.condition:
+            self.loaders[name] = loader
+            self.states[name] = PENDING
+
+    def _Load(self, name):
+        # Called with the asset marked LOADING by this thread
+        start = time.perf_counter()
+        try:
+            asset = self.loaders[name]()
+        except Exception as error:
+            with self.condition:
+                self.errors[name] = error
+                self.states[name] = FAILED
+                self.condition.notify_all()
+            return
+        end = time.perf_counter()
+        with self.condition:
+            self.assets[name] = asset
+            self.states[name] = READY
+            self.timings[name] = (threading.current_thread().name, start, end)
+            self.condition.notify_all()
+
+    def _PrefetchAll(self):
+        for name in list(self.loaders):
+            with self.condition:
+                if self.states[name] != PENDING:
+                    continue
+                self.states[name] = LOADING
+            self._Load(name)
+
+    def Prefetch(self):
+        # Safe to call every frame, only the first call starts the loader thread
+        with self.condition:
+            if self.thread is not None or all(state != PENDING for state in self.states.values()):
+                return
+            self.thread = threading.Thread(target=self._PrefetchAll, name='asset-prefetch', daemon=True)
+        self.thread.start()
+
+    def IsReady(self, name=None):
+        with self.condition:
+            names = self.states if name is None else [name]
+            return all(self.states[n] == READY for n in names)
+
+    def Get(self, name):
+        with self.condition:
+            state = self.states[name]
+            if state == PENDING:
+                self.states[name] = LOADING
+            elif state == LOADING:
+                start = time.perf_counter()
+                while self.states[name] == LOADING:
+                    self.condition.wait()
+                self.waits[name] = self.waits.get(name, 0.0) + time.perf_counter() - start
+        if state == PENDING:
+            self._Load(name)
+        with self.condition:
+            if self.states[name] == FAILED:
+                raise RuntimeError(f"Loading asset '{name}' failed") from self.errors[name]
+            return self.assets[name]
+
+class MeshProps(dict):
+    # Object properties dict whose 'vertices', 'indices' and bounding 'sphere' are fetched from the registry on first
+    # access, so building the props does not load the mesh. Level(n) gives the same props with the vertices and indices
+    # of level of detail n (see utils/lod.py), pooled under their own mesh name.
+    def __init__(self, registry, assetName, meshName, properties, level=0):
+        super().__init__(properties)
+        self.registry = registry
+        self.assetName = assetName
+        self.baseName = meshName
+        self.level = level
+        self.meshName = meshName if level == 0 else f'{meshName}@{level}'
+
+    def Level(self, level):
+        return MeshProps(self.registry, self.assetName, self.baseName, self, level)
+
+    def __missing__(self, key):
+        if key in ('vertices', 'indices'):
+            return self.registry.Get(self.assetName)[self.baseName][key if self.level == 0 else f'{key}{self.level}']
+        if key == 'sphere':
+            return self.registry.Get(self.assetName)[self.baseName][key]
+        raise KeyError(key)
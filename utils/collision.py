@@ -0,0 +1,52 @@
+import numpy as np
+from utils.spatial_hash import pairs_within
+
+###############################################################
+# Continuous (swept) hit tests
+#
+# A laser is tested over the whole segment it covered during the tick instead of at its end point, so fast lasers
+# cannot step over a target at low tick rates.
+
+def swept_sphere_hits(starts, ends, centres, radius, pairs=pairs_within):
+    # Segments starts[i] -> ends[i] against spheres of the given radius around centres[j]. Returns (segment, sphere,
+    # time) for every segment that touches a sphere, with time in [0, 1] the fraction of the segment at first contact
+    # (0 if it starts inside). Candidates come from the broadphase around the segment midpoints.
+    starts, ends, centres = (np.asarray(points, dtype=np.float64).reshape(-1, 3) for points in (starts, ends, centres))
+    if len(starts) == 0 or len(centres) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float64)
+    steps = ends - starts
+    halfLengths = 0.5 * np.sqrt(np.einsum('ij,ij->i', steps, steps))
+    segment, sphere = pairs(starts + 0.5 * steps, centres, radius + halfLengths.max())
+    if len(segment) == 0:
+        return segment, sphere, np.zeros(0, dtype=np.float64)
+
+    # |start + t * step - centre|^2 = radius^2, a t^2 + 2 b t + c = 0
+    step = steps[segment]
+    offset = starts[segment] - centres[sphere]
+    a = np.einsum('ij,ij->i', step, step)
+    b = np.einsum('ij,ij->i', step, offset)
+    c = np.einsum('ij,ij->i', offset, offset) - radius * radius
+    discriminant = b * b - a * c
+    moving = a > 0
+    entry = np.where(moving & (discriminant >= 0), (-b - np.sqrt(np.maximum(discriminant, 0.0))) / np.where(moving, a, 1.0), np.inf)
+
+    inside = c < 0
+    hit = inside | ((discriminant >= 0) & (entry >= 0) & (entry <= 1))
+    times = np.where(inside, 0.0, entry)
+    return segment[hit], sphere[hit], times[hit]
+
+def first_hits(segment, sphere, times):
+    # Resolves hits in order of time of impact: every segment stops at its earliest hit and every sphere can only be
+    # hit once. Returns the (segment, sphere) pairs that happen.
+    if len(segment) == 0:
+        return segment, sphere
+    order = np.lexsort((sphere, segment, times))
+    spentSegments, spentSpheres = set(), set()
+    hits = []
+    for i, j in zip(segment[order].tolist(), sphere[order].tolist()):
+        if i not in spentSegments and j not in spentSpheres:
+            spentSegments.add(i)
+            spentSpheres.add(j)
+            hits.append((i, j))
+    hits = np.array(hits, dtype=np.intp).reshape(-1, 2)
+    return hits[:, 0], hits[:, 1]
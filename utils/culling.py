@@ -0,0 +1,43 @@
+import numpy as np
+
+###############################################################
+# View-frustum culling
+#
+# Every mesh gets a bounding sphere in model space when it is cooked (see utils/asset_pack.py). At draw time the
+# spheres of all objects are moved to world space by their model matrices, with the radius scaled by the largest axis
+# of the object's scale, and tested against the six planes of the camera frustum in one vectorized pass. Only objects
+# at least partly inside the frustum are handed to GL.
+#
+# The frustum is the volume the shaders project on screen: they divide camera coordinates by |z| and scale by the
+# focal length, then map [-far, -near] in z and the camera plane's width and height to clip space, which is a
+# symmetric perspective frustum with a vertical field of view of fov.
+
+def frustum_planes(viewMatrix, fov, aspect, near, far):
+    # (6, 4) world-space planes [nx, ny, nz, d], normals pointing inside and of unit length: a point p is inside a plane
+    # when n . p + d >= 0
+    tanY = np.tan(np.radians(fov / 2))
+    tanX = aspect * tanY
+    planes = np.array([
+        [0, 0, -1, -near], # Near: z <= -near
+        [0, 0, 1, far], # Far: z >= -far
+        [1, 0, -tanX, 0], # Left: x >= tanX * z
+        [-1, 0, -tanX, 0], # Right: x <= -tanX * z
+        [0, 1, -tanY, 0], # Bottom
+        [0, -1, -tanY, 0] # Top
+    ], dtype=np.float64)
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    # A camera-space plane q is q @ viewMatrix in world space, the view matrix is a rigid transform so normals stay unit
+    return planes @ np.asarray(viewMatrix, dtype=np.float64)
+
+def world_spheres(matrices, spheres, scales):
+    # Centres and radii of model-space spheres [x, y, z, r] under (N, 4, 4) model matrices and (N, 3) scales
+    centres = np.einsum('nij,nj->ni', matrices[:, :3, :3], spheres[:, :3]) + matrices[:, :3, 3]
+    radii = spheres[:, 3] * np.abs(scales).max(axis=1)
+    return centres, radii
+
+def spheres_visible(planes, centres, radii):
+    # Mask of the spheres that are not entirely behind one of the planes
+    if len(centres) == 0:
+        return np.zeros(0, dtype=bool)
+    distances = centres @ planes[:, :3].T + planes[:, 3]
+    return np.all(distances >= -radii[:, np.newaxis], axis=1)
@@ -0,0 +1,156 @@
+import numpy as np
+from utils.transforms import model_matrices, interpolate_transforms
+
+###############################################################
+# Struct-of-arrays entity store
+#
+# Every component is a contiguous array with one row per live entity, rows [0, count) are always packed so systems can
+# work on whole arrays (or the rows of one type) at once. Despawning moves the last row into the hole (O(1)), so rows
+# are not stable: entities are referred to by handles, which pack a slot and the slot's generation into one int and
+# stop resolving once the entity is gone, even if the slot has been reused.
+#
+# Component arrays are reallocated when the store grows, so views into them must not be kept across Spawn().
+
+NO_ENTITY = -1
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+class EntityStore:
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        self.count = 0
+        self.transform = np.zeros((0, 9), dtype=np.float64) # [position, rotation, scale]
+        self.built = np.zeros((0, 9), dtype=np.float64) # The transform each model matrix was last built from
+        self.previous = np.zeros((0, 9), dtype=np.float64) # The transform at the start of the last tick, for interpolation
+        self.matrices = np.zeros((0, 4, 4), dtype=np.float32)
+        self.velocity = np.zeros((0, 3), dtype=np.float64)
+        self.colour = np.zeros((0, 4), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool) # Cleared by systems to despawn in bulk with DespawnDead()
+        self.type = np.zeros(0, dtype=np.int8)
+        self.spawnTime = np.zeros(0, dtype=np.float64)
+        self.anchor = np.zeros(0, dtype=np.int64) # Handle of the entity this one is attached to, or NO_ENTITY
+        self.lod = np.zeros(0, dtype=np.int8) # Level of detail it was last drawn at (see utils/lod.py)
+        self.rowSlot = np.zeros(0, dtype=np.int64)
+
+        # Slot table behind the handles
+        self.slotRow = np.zeros(0, dtype=np.int64)
+        self.generation = np.zeros(0, dtype=np.int64)
+        self.freeSlots = []
+        self.derived = {} # Values computed from the row layout (see Derived()), dropped whenever rows are added or moved
+        self.Grow(capacity)
+
+    def Columns(self):
+        return ('transform', 'built', 'previous', 'matrices', 'velocity', 'colour', 'alive', 'type', 'spawnTime', 'anchor', 'lod', 'rowSlot')
+
+    def Grow(self, capacity):
+        def grown(array):
+            result = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            result[:len(array)] = array
+            return result
+        for name in self.Columns() + ('slotRow', 'generation'):
+            setattr(self, name, grown(getattr(self, name)))
+        self.freeSlots += range(capacity - 1, self.capacity - 1, -1)
+        self.capacity = capacity
+        self.position, self.rotation, self.scale = self.transform[:, 0:3], self.transform[:, 3:6], self.transform[:, 6:9]
+
+    def Spawn(self, entityType, position, rotation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0), colour=(1.0, 1.0, 1.0, 1.0),
+              velocity=(0.0, 0.0, 0.0), spawnTime=0.0, anchor=NO_ENTITY):
+        if self.count == self.capacity:
+            self.Grow(self.capacity * 2)
+        row = self.count
+        self.count += 1
+        self.derived.clear()
+        slot = self.freeSlots.pop()
+        self.slotRow[slot] = row
+        self.rowSlot[row] = slot
+
+        self.position[row], self.rotation[row], self.scale[row] = position, rotation, scale
+        self.built[row] = np.nan # Never equal, so the first ModelMatrices() call builds the matrix
+        self.previous[row] = self.transform[row] # Entities spawned during a tick are drawn where they spawned
+        self.velocity[row] = velocity
+        self.colour[row] = colour
+        self.alive[row] = True
+        self.type[row] = entityType
+        self.spawnTime[row] = spawnTime
+        self.anchor[row] = anchor
+        self.lod[row] = 0
+        return (int(self.generation[slot]) << SLOT_BITS) | slot
+
+    def IsValid(self, handle):
+        slot = handle & SLOT_MASK
+        return handle >= 0 and slot < self.capacity and self.generation[slot] == handle >> SLOT_BITS
+
+    def Row(self, handle):
+        if not self.IsValid(handle):
+            raise KeyError(f"Stale entity handle {handle}")
+        return int(self.slotRow[handle & SLOT_MASK])
+
+    def RowsOf(self, handles):
+        # Rows of an array of handles, -1 for handles that no longer resolve
+        handles = np.asarray(handles, dtype=np.int64)
+        slots = np.where(handles >= 0, handles & SLOT_MASK, 0)
+        valid = (handles >= 0) & (self.generation[slots] == handles >> SLOT_BITS)
+        return np.where(valid, self.slotRow[slots], -1)
+
+    def Handles(self, rows):
+        slots = self.rowSlot[rows]
+        return (self.generation[slots] << SLOT_BITS) | slots
+
+    def Derived(self, key, build):
+        # build() computed once until the next Spawn() or despawn, for lookups that only depend on which entity is in
+        # which row (e.g. the rows of a type). The result is shared, it must not be modified.
+        if key not in self.derived:
+            self.derived[key] = build()
+        return self.derived[key]
+
+    def Rows(self, entityType):
+        return self.Derived(('rows', entityType), lambda: np.flatnonzero(self.type[:self.count] == entityType))
+
+    def Despawn(self, handle):
+        self.RemoveRow(self.Row(handle))
+
+    def RemoveRow(self, row):
+        # Swap-remove: the last row moves into the hole and its slot is repointed
+        last = self.count - 1
+        slot = self.rowSlot[row]
+        self.derived.clear()
+        if row != last:
+            for name in self.Columns():
+                column = getattr(self, name)
+                column[row] = column[last]
+            self.slotRow[self.rowSlot[row]] = row
+        self.generation[slot] += 1
+        self.freeSlots.append(int(slot))
+        self.count = last
+
+    def DespawnDead(self):
+        # Highest rows first, so that the rows still to be removed are never the ones being moved
+        for row in np.flatnonzero(~self.alive[:self.count])[::-1]:
+            self.RemoveRow(row)
+
+    def Clear(self):
+        for row in range(self.count - 1, -1, -1):
+            self.RemoveRow(row)
+
+    def ModelMatrices(self, rows):
+        # Model matrices of the given rows, rebuilt only for rows whose transform changed (see utils/transforms.py)
+        stale = rows[np.any(self.transform[rows] != self.built[rows], axis=1)]
+        if len(stale):
+            transform = self.transform[stale]
+            self.matrices[stale] = model_matrices(transform[:, 0:3], transform[:, 3:6], transform[:, 6:9])
+            self.built[stale] = transform
+        return self.matrices[rows]
+
+    def SaveTransforms(self):
+        # Call at the start of every tick, InterpolatedMatrices() blends from these transforms to the current ones
+        self.previous[:self.count] = self.transform[:self.count]
+
+    def InterpolatedMatrices(self, rows, alpha):
+        # Model matrices of the given rows between the start (alpha 0) and the end (alpha 1) of the last tick. Rows
+        # that did not move use the cached matrices.
+        matrices = self.ModelMatrices(rows)
+        moved = np.any(self.previous[rows] != self.transform[rows], axis=1)
+        if alpha < 1.0 and moved.any():
+            transform = interpolate_transforms(self.previous[rows[moved]], self.transform[rows[moved]], alpha)
+            matrices[moved] = model_matrices(transform[:, 0:3], transform[:, 3:6], transform[:, 6:9])
+        return matrices
@@ -2,22 +2,37 @@ import ctypes
 import numpy as np
 import copy
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileProgram, compileShader
+from utils.transforms import TRANSFORM_KEYS, model_matrices
+from utils.culling import frustum_planes
+from utils.render_queue import OPAQUE
+from utils.program_cache import programCache
+from utils.profiler import frameCounters
 
 class VBO:
-    def __init__(self, vertices):
+    def __init__(self, vertices, usage=GL_STATIC_DRAW):
         self.ID = glGenBuffers(1)
+        self.usage = usage
+        self.floatsPerVertex = vertices.shape[-1]
         glBindBuffer(GL_ARRAY_BUFFER, self.ID)
-        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, usage)
     def Use(self):
         glBindBuffer(GL_ARRAY_BUFFER, self.ID)
+    def Update(self, vertices):
+        # Respecifies the whole buffer, which also lets the driver orphan the storage still in use by earlier draws
+        glBindBuffer(GL_ARRAY_BUFFER, self.ID)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, self.usage)
     def Delete(self):
         glDeleteBuffers(1, (self.ID,))
 
+# GL types of the index dtypes a mesh can come with (see utils/mesh_optimizer.py)
+INDEX_TYPES = {np.dtype(np.uint16): GL_UNSIGNED_SHORT, np.dtype(np.uint32): GL_UNSIGNED_INT, np.dtype(np.int32): GL_UNSIGNED_INT}
+
 class IBO:
     def __init__(self, indices):
         self.ID = glGenBuffers(1)
         self.count = len(indices)
+        self.type = INDEX_TYPES[np.asarray(indices).dtype]
+        glBindVertexArray(0) # The element buffer binding belongs to the bound vertex array, leave every VAO's own alone
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ID)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
     def Use(self):
@@ -25,30 +40,252 @@ class IBO:
     def Delete(self):
         glDeleteBuffers(1, (self.ID,))
 
+# Per-vertex attributes in the order they are interleaved: position at location 0, colour at 1. A mesh carries the
+# leading ones that fill its vertex width, so positions-only meshes from the asset pack have 3 floats per vertex and the
+# coloured HUD meshes 6.
+VERTEX_ATTRIBUTES = (3, 3)
+# Per-instance attributes: model matrix columns at locations 2-5, colour at 6
+INSTANCE_FLOATS = 16 + 4
+
+def vertex_layout(floatsPerVertex):
+    # [(location, components, offset in floats)] of the vertex attributes that make up a vertex of the given width
+    layout, offset = [], 0
+    for location, components in enumerate(VERTEX_ATTRIBUTES):
+        if offset == floatsPerVertex:
+            break
+        layout.append((location, components, offset))
+        offset += components
+    if offset != floatsPerVertex:
+        raise ValueError(f"No vertex layout has {floatsPerVertex} floats per vertex")
+    return layout
+
 class VAO:
-    def __init__(self, vbo : VBO):
+    # The index buffer, if given, is recorded in the vertex array, so binding the VAO is all a draw needs
+    def __init__(self, vbo : VBO, instanceVbo : VBO = None, ibo : IBO = None):
         self.vao = glGenVertexArrays(1)
         glBindVertexArray(self.vao)
         vbo.Use()
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 6 * ctypes.sizeof(ctypes.c_float), ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 6 * ctypes.sizeof(ctypes.c_float), ctypes.c_void_p(3 * ctypes.sizeof(ctypes.c_float)))
+        stride = vbo.floatsPerVertex * ctypes.sizeof(ctypes.c_float)
+        for location, components, offset in vertex_layout(vbo.floatsPerVertex):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, components, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(offset * ctypes.sizeof(ctypes.c_float)))
+        if instanceVbo is not None:
+            instanceVbo.Use()
+            stride = INSTANCE_FLOATS * ctypes.sizeof(ctypes.c_float)
+            for i in range(5):
+                glEnableVertexAttribArray(2 + i)
+                glVertexAttribPointer(2 + i, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(4 * i * ctypes.sizeof(ctypes.c_float)))
+                glVertexAttribDivisor(2 + i, 1)
+        if ibo is not None:
+            ibo.Use()
+        glBindVertexArray(0)
     def Use(self):
         glBindVertexArray(self.vao)
     def Delete(self):
         glDeleteVertexArrays(1, (self.vao,))
 
+class Mesh:
+    def __init__(self, key, vertices, indices):
+        self.key = key
+        self.vbo = VBO(vertices)
+        self.ibo = IBO(indices)
+        self.vao = VAO(self.vbo, ibo=self.ibo)
+    def Delete(self):
+        self.vao.Delete()
+        self.vbo.Delete()
+        self.ibo.Delete()
+
+class GpuResources:
+    # Owns the GL programs, meshes, instance batches and uniform buffers of the game. Each is created on the first
+    # Acquire of its key and shared by reference count, so restarting a scene picks the previous scene's objects up
+    # again instead of compiling and uploading them anew. Unreferenced resources stay resident until Collect(), which
+    # lets a mesh survive short gaps (e.g. no lasers alive) and restarts; Collect() deletes them newest first, so a batch
+    # goes before the mesh it hands back. Clear() deletes everything at shutdown, whether still referenced or not.
+    def __init__(self):
+        self.resources = {} # (kind, key) -> resource, in creation order
+
+    def _Acquire(self, kind, key, create):
+        resource = self.resources.get((kind, key))
+        if resource is None:
+            resource = create()
+            resource.resourceKey = (kind, key)
+            resource.refCount = 0
+            self.resources[(kind, key)] = resource
+        resource.refCount += 1
+        return resource
+
+    def Program(self, source):
+        # source: {'vertex_shader', 'fragment_shader'} GLSL as in assets/shaders/shaders.py
+        key = (source["vertex_shader"], source["fragment_shader"])
+        return self._Acquire('program', key, lambda: Shader(source["vertex_shader"], source["fragment_shader"]))
+
+    def Mesh(self, key, properties):
+        return self._Acquire('mesh', key, lambda: Mesh(key, properties['vertices'], properties['indices']))
+
+    def Batch(self, key, properties):
+        # A batch's instance buffer holds one submission at a time, so a batch is only used by one owner per frame
+        return self._Acquire('batch', key, lambda: InstanceBatch(key, properties))
+
+    def UniformBuffer(self, name, size):
+        return self._Acquire('uniform buffer', name, lambda: UniformBuffer(UNIFORM_BLOCK_BINDINGS[name], size))
+
+    def Release(self, resource):
+        resource.refCount -= 1
+
+    def Collect(self):
+        for key in reversed(list(self.resources)):
+            resource = self.resources[key]
+            if resource.refCount <= 0:
+                resource.Delete()
+                del self.resources[key]
+
+    def Clear(self):
+        # A program or vertex array that is still bound is only flagged for deletion, unbind them so everything goes now
+        glUseProgram(0)
+        glBindVertexArray(0)
+        for key in reversed(list(self.resources)):
+            self.resources.pop(key).Delete()
+
+    def Counts(self):
+        # {kind: live resources}
+        counts = {}
+        for kind, key in self.resources:
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+gpuResources = GpuResources()
+
+class InstanceBatch:
+    # Draws all instances of one pooled mesh with a single glDrawElementsInstanced call, using a shader that reads the
+    # model matrix and colour from the per-instance attributes (see instanced_shader)
+    def __init__(self, key, properties):
+        self.mesh = gpuResources.Mesh(key, properties)
+        self.instances = VBO(np.zeros((1, INSTANCE_FLOATS), dtype=np.float32), GL_STREAM_DRAW)
+        self.vao = VAO(self.mesh.vbo, self.instances, self.mesh.ibo)
+
+    def Upload(self, modelMatrices, colours):
+        count = len(modelMatrices)
+        instanceData = np.empty((count, INSTANCE_FLOATS), dtype=np.float32)
+        instanceData[:, :16] = np.transpose(modelMatrices, (0, 2, 1)).reshape(count, 16) # GLSL reads mat4 attributes column by column
+        instanceData[:, 16:] = colours
+        self.instances.Update(instanceData)
+
+    def Draw(self, shader, modelMatrices, colours):
+        count = len(modelMatrices)
+        if count == 0:
+            return
+        self.Upload(modelMatrices, colours)
+        shader.Use()
+        self.vao.Use()
+        glDrawElementsInstanced(GL_TRIANGLES, self.mesh.ibo.count, self.mesh.ibo.type, None, count)
+
+    def Submit(self, queue, shader, modelMatrices, colours, distances):
+        # Uploads the instances nearest first and queues one draw of all of them at the nearest one's depth
+        count = len(modelMatrices)
+        if count == 0:
+            return
+        order = np.argsort(distances, kind='stable')
+        self.Upload(modelMatrices[order], colours[order])
+        queue.Submit(shader, self.vao, self.mesh.ibo, float(distances[order[0]]), instances=count)
+
+    def Delete(self):
+        self.vao.Delete()
+        self.instances.Delete()
+        gpuResources.Release(self.mesh)
+
+# Binding point of every uniform block used by the shaders
+UNIFORM_BLOCK_BINDINGS = {'Camera': 0}
+
+class UniformBuffer:
+    def __init__(self, binding, size):
+        self.ID = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ID)
+        glBufferData(GL_UNIFORM_BUFFER, size, None, GL_DYNAMIC_DRAW)
+        glBindBufferBase(GL_UNIFORM_BUFFER, binding, self.ID)
+    def Update(self, offset, data):
+        glBindBuffer(GL_UNIFORM_BUFFER, self.ID)
+        glBufferSubData(GL_UNIFORM_BUFFER, offset, data.nbytes, data)
+    def Delete(self):
+        glDeleteBuffers(1, [self.ID])
+
 class Shader:
     def __init__(self, vertex_shader, fragment_shader):
-        self.ID = compileProgram(compileShader(vertex_shader, GL_VERTEX_SHADER), compileShader(fragment_shader, GL_FRAGMENT_SHADER))
+        # Loaded from the program binary cache when it holds this program for the current driver, compiled otherwise
+        self.ID = programCache.Load(vertex_shader, fragment_shader)
+
+        # Active uniforms are looked up once at link time: name -> (location, GL type)
+        self.uniforms = {}
+        for index in range(glGetProgramiv(self.ID, GL_ACTIVE_UNIFORMS)):
+            name, size, glType = glGetActiveUniform(self.ID, index)
+            name = name.decode('utf-8') if isinstance(name, bytes) else name
+            name = name.split('[')[0]
+            location = glGetUniformLocation(self.ID, name.encode('utf-8'))
+            if location != -1: # Members of uniform blocks have no location, they are set through the block's buffer
+                self.uniforms[name] = (location, glType)
+        self.values = {} # Last value uploaded per uniform, uniform values are program state so they persist between draws
+
+        # Uniform blocks are attached to their fixed binding points, so one buffer serves every program
+        for name, binding in UNIFORM_BLOCK_BINDINGS.items():
+            index = glGetUniformBlockIndex(self.ID, name.encode('utf-8'))
+            if index != GL_INVALID_INDEX:
+                glUniformBlockBinding(self.ID, index, binding)
         self.Use()
     def Use(self):
         glUseProgram(self.ID)
     def Delete(self):
-        glDeleteProgram((self.ID,))
+        glDeleteProgram(self.ID)
+
+    # Typed setters, the program must be in use. Uniforms the compiler removed are ignored like GL does for location -1,
+    # and uploads of the value the program already holds are skipped.
+    def _Location(self, name, glType):
+        uniform = self.uniforms.get(name)
+        if uniform is None:
+            return -1
+        if uniform[1] != glType:
+            raise TypeError(f"Uniform '{name}' has GL type {uniform[1]}, not {glType}")
+        return uniform[0]
+
+    def _Changed(self, name, value):
+        if self.values.get(name) == value:
+            frameCounters.Add('uniform uploads skipped')
+            return False
+        self.values[name] = value
+        frameCounters.Add('uniform uploads')
+        return True
+
+    def SetFloat(self, name, value):
+        location = self._Location(name, GL_FLOAT)
+        if location != -1 and self._Changed(name, float(value)):
+            glUniform1f(location, value)
+
+    def SetVector2(self, name, x, y):
+        location = self._Location(name, GL_FLOAT_VEC2)
+        if location != -1 and self._Changed(name, (float(x), float(y))):
+            glUniform2f(location, x, y)
+
+    def SetVector3(self, name, x, y, z):
+        location = self._Location(name, GL_FLOAT_VEC3)
+        if location != -1 and self._Changed(name, (float(x), float(y), float(z))):
+            glUniform3f(location, x, y, z)
+
+    def SetVector4(self, name, x, y, z, w):
+        location = self._Location(name, GL_FLOAT_VEC4)
+        if location != -1 and self._Changed(name, (float(x), float(y), float(z), float(w))):
+            glUniform4f(location, x, y, z, w)
+
+    def SetMatrix4(self, name, matrix):
+        # Row-major numpy matrix, uploaded transposed like the rest of the code does
+        location = self._Location(name, GL_FLOAT_MAT4)
+        if location == -1:
+            return
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if self._Changed(name, matrix.tobytes()):
+            glUniformMatrix4fv(location, 1, GL_TRUE, matrix)
 
 class Camera:
+    # std140 layout of the Camera uniform block: viewMatrix, projectionMatrix (row_major mat4) and focalLength
+    VIEW_OFFSET, PROJECTION_OFFSET, FOCAL_LENGTH_OFFSET, BLOCK_SIZE = 0, 64, 128, 144
+
     def __init__(self, height, width):
         self.height = height
         self.width = width
@@ -61,20 +298,22 @@ class Camera:
 
         self.f = 1.0
 
-    def Update(self, shader):
-        shader.Use()
-
-        # View matrix
+        # Matrices are rebuilt only when their inputs change, and the block is only written when its contents do
+        self.viewKey = None
+        self.projectionKey = None
+        self.uploaded = {}
+        self.uniformBuffer = gpuResources.UniformBuffer('Camera', self.BLOCK_SIZE)
 
-        viewTranslate = np.array([  [1, 0, 0, -self.position[0]],
-                                    [0, 1, 0, -self.position[1]],
-                                    [0, 0, 1, -self.position[2]],
+    def ComputeView(self, position, lookAt):
+        viewTranslate = np.array([  [1, 0, 0, -position[0]],
+                                    [0, 1, 0, -position[1]],
+                                    [0, 0, 1, -position[2]],
                                     [0, 0, 0, 1]], dtype = np.float32)
         
-        if np.linalg.norm(self.lookAt) != 0:
-            n = - self.lookAt / np.linalg.norm(self.lookAt)
+        if np.linalg.norm(lookAt) != 0:
+            n = - lookAt / np.linalg.norm(lookAt)
         else:
-            n = -self.lookAt
+            n = -lookAt
     
         u = np.cross(self.up, n)
 
@@ -91,10 +330,9 @@ class Camera:
                             [n[0], n[1], n[2],0],
                             [  0,    0,    0, 1]], dtype = np.float32)
 
-        viewMatrix = viewRotate @ viewTranslate
-        
-        # Projection matrix
+        return viewRotate @ viewTranslate
 
+    def ComputeProjection(self):
         orthoTranslate = np.array([  [1,0,0,0],
                                     [0,1,0,0],
                                     [0,0,1, (self.near + self.far)/2.0],
@@ -108,108 +346,105 @@ class Camera:
                                 [0, 0, -2.0/(self.far - self.near), 0],
                                 [0, 0, 0, 1]], dtype = np.float32)
 
+        return orthoScale @ orthoTranslate
+
+    def Update(self, position=None, lookAt=None):
+        # Call once per frame before drawing, every program reads the matrices from the Camera uniform block. The view
+        # can be drawn from another pose than the camera's own (an interpolated one) without changing it.
+        position = self.position if position is None else position
+        lookAt = self.lookAt if lookAt is None else lookAt
+        viewKey = (tuple(position), tuple(lookAt), tuple(self.up))
+        if viewKey != self.viewKey:
+            self.viewMatrix = self.ComputeView(position, lookAt)
+            self.viewKey = viewKey
+
+        projectionKey = (self.fov, self.near, self.far, self.f, self.width, self.height)
+        if projectionKey != self.projectionKey:
+            self.projectionMatrix = self.ComputeProjection()
+            self.projectionKey = projectionKey
+
+        self.Publish(self.VIEW_OFFSET, self.viewMatrix)
+        self.Publish(self.PROJECTION_OFFSET, self.projectionMatrix)
+        self.Publish(self.FOCAL_LENGTH_OFFSET, np.array([self.f], dtype=np.float32))
+
+    def FrustumPlanes(self):
+        # World-space planes of the volume the last Update() made visible (see utils/culling.py)
+        return frustum_planes(self.viewMatrix, self.fov, self.width / self.height, self.near, self.far)
+
+    def Publish(self, offset, value):
+        data = np.ascontiguousarray(value, dtype=np.float32)
+        if self.uploaded.get(offset) == data.tobytes():
+            frameCounters.Add('uniform uploads skipped')
+            return
+        self.uniformBuffer.Update(offset, data)
+        self.uploaded[offset] = data.tobytes()
+        frameCounters.Add('uniform uploads')
 
-        projectionMatrix = orthoScale @ orthoTranslate
-
-        viewMatrixLocation = glGetUniformLocation(shader.ID, "viewMatrix".encode('utf-8'))
-        glUniformMatrix4fv(viewMatrixLocation, 1, GL_TRUE, viewMatrix)
-
-        projectionMatrixLocation = glGetUniformLocation(shader.ID, "projectionMatrix".encode('utf-8'))
-        glUniformMatrix4fv(projectionMatrixLocation, 1, GL_TRUE, projectionMatrix)
-
-        focalLengthLocation = glGetUniformLocation(shader.ID, "focalLength".encode('utf-8'))
-        glUniform1f(focalLengthLocation, self.f)
-
-        self.viewMatrix = viewMatrix
-        self.projectionMatrix = projectionMatrix
+    def Delete(self):
+        # Hands the uniform buffer back, the next Camera picks it up again
+        gpuResources.Release(self.uniformBuffer)
 
 class Object:
     def __init__(self, objType, shader, properties):
-        self.properties = copy.deepcopy(properties)
-
-        self.vbo = VBO(self.properties['vertices'])
-        self.ibo = IBO(self.properties['indices'])
-        self.vao = VAO(self.vbo)
-
-        self.properties.pop('vertices')
-        self.properties.pop('indices')
+        # Only the per-instance state is copied, the mesh comes from the shared GPU resources (keyed by asset name for props
+        # built on the asset registry, by object type otherwise) and is uploaded once
+        self.properties = {key: copy.deepcopy(value) for key, value in properties.items() if key not in ('vertices', 'indices')}
+        self.built = None # The [position, rotation, scale] the model matrix was last built from
+        self.mesh = gpuResources.Mesh(getattr(properties, 'meshName', objType), properties)
 
         # Create shaders
         self.shader = shader
 
-    def Draw(self): # Suggestion: Can assosiate new class variable 'self.objType' to write different Draw logic for different types of objects
-        position = self.properties['position']
-        rotation = self.properties['rotation']
-        scale = self.properties['scale']
+    def ComputeModelMatrix(self):
+        # Rebuilt only if the transform changed since the last call, as EntityStore.ModelMatrices() does for entities
+        transform = np.concatenate([np.asarray(self.properties[key], dtype=np.float64) for key in TRANSFORM_KEYS])
+        if self.built is None or np.any(transform != self.built):
+            self.modelMatrix = model_matrices(transform[np.newaxis, 0:3], transform[np.newaxis, 3:6], transform[np.newaxis, 6:9])[0]
+            self.built = transform
+        return self.modelMatrix
 
-        translation_matrix = np.array([[1,0,0, position[0]],
-                                    [0,1,0, position[1]],
-                                    [0,0,1, position[2]],
-                                    [0,0,0,1]], dtype = np.float32)
-        
-        rotation_z_matrix = np.array([
-                                    [np.cos(rotation[2]), -np.sin(rotation[2]), 0, 0],
-                                    [np.sin(rotation[2]), np.cos(rotation[2]), 0, 0],
-                                    [0, 0, 1, 0],
-                                    [0, 0, 0, 1]
-                                ], dtype=np.float32)
-        rotation_x_matrix = np.array([
-                                    [1, 0, 0, 0],
-                                    [0, np.cos(rotation[0]), -np.sin(rotation[0]), 0],
-                                    [0, np.sin(rotation[0]), np.cos(rotation[0]), 0],
-                                    [0, 0, 0, 1]
-                                ], dtype=np.float32)
-        rotation_y_matrix = np.array([
-                                    [np.cos(rotation[1]), 0, np.sin(rotation[1]), 0],
-                                    [0, 1, 0, 0],
-                                    [-np.sin(rotation[1]), 0, np.cos(rotation[1]), 0],
-                                    [0, 0, 0, 1]
-                                ], dtype=np.float32)
-
-        scale_matrix = np.array([[scale[0], 0,0,0],
-                                [0,scale[1],0,0],
-                                [0,0,scale[2],0],
-                                [0,0,0,1]], dtype = np.float32)
-        
-        rotationMatrix = rotation_z_matrix @ rotation_y_matrix @ rotation_x_matrix # Roll then pitch then yaw in order (right to left applied)
-        self.modelMatrix = translation_matrix @ rotationMatrix @ scale_matrix
+    def Draw(self, modelMatrix=None): # Suggestion: Can assosiate new class variable 'self.objType' to write different Draw logic for different types of objects
+        # modelMatrix overrides the one built from the properties (to draw an interpolated transform)
+        self.modelMatrix = self.ComputeModelMatrix() if modelMatrix is None else modelMatrix
 
         # Bind the shader, set uniforms, bind vao (automatically binds vbo) and ibo
         self.shader.Use()
-        modelMatrixLocation = glGetUniformLocation(self.shader.ID, "modelMatrix".encode('utf-8'))
-        glUniformMatrix4fv(modelMatrixLocation, 1, GL_TRUE, self.modelMatrix)
-        
-        colourLocation = glGetUniformLocation(self.shader.ID, "objectColour".encode('utf-8'))
-        glUniform4f(colourLocation, self.properties["colour"][0], 
+        self.shader.SetMatrix4("modelMatrix", self.modelMatrix)
+        self.shader.SetVector4("objectColour", self.properties["colour"][0], 
                     self.properties["colour"][1], 
                     self.properties["colour"][2], 
                     self.properties["colour"][3])
-        self.vao.Use()
-        self.ibo.Use()
+        self.mesh.vao.Use()
 
         # Issue Draw call with primitive type
-        glDrawElements(GL_TRIANGLES, self.ibo.count, GL_UNSIGNED_INT, None)
+        glDrawElements(GL_TRIANGLES, self.mesh.ibo.count, self.mesh.ibo.type, None)
+
+    def Submit(self, queue, depth, modelMatrix=None, uniforms=None, renderPass=OPAQUE):
+        # Queues a draw of the mesh with the object's shader. uniforms(shader) sets its uniforms when the draw is issued,
+        # by default the model matrix (from the properties unless given) and colour, as Draw() does.
+        if uniforms is None:
+            self.modelMatrix = self.ComputeModelMatrix() if modelMatrix is None else modelMatrix
+            matrix, colour = np.array(self.modelMatrix), tuple(float(c) for c in self.properties["colour"])
+            def uniforms(shader):
+                shader.SetMatrix4("modelMatrix", matrix)
+                shader.SetVector4("objectColour", *colour)
+        queue.Submit(self.shader, self.mesh.vao, self.mesh.ibo, depth, uniforms, renderPass=renderPass)
 
     def DrawEdges(self, edge_shader, viewMatrix, projectionMatrix, f):
         self.viewMatrix = viewMatrix
         self.projectionMatrix = projectionMatrix
         self.f = f
         edge_shader.Use()
-        modelMatrixLocation = glGetUniformLocation(edge_shader.ID, "modelMatrix".encode('utf-8'))
-        glUniformMatrix4fv(modelMatrixLocation, 1, GL_TRUE, self.modelMatrix)
-        
-        viewMatrixLocation = glGetUniformLocation(edge_shader.ID, "viewMatrix".encode('utf-8'))
-        glUniformMatrix4fv(viewMatrixLocation, 1, GL_TRUE, self.viewMatrix)
-
-        projectionMatrixLocation = glGetUniformLocation(edge_shader.ID, "projectionMatrix".encode('utf-8'))
-        glUniformMatrix4fv(projectionMatrixLocation, 1, GL_TRUE, self.projectionMatrix)
+        edge_shader.SetMatrix4("modelMatrix", self.modelMatrix) # View and projection come from the Camera uniform block
 
-        focalLengthLocation = glGetUniformLocation(edge_shader.ID, "focalLength".encode('utf-8'))
-        glUniform1f(focalLengthLocation, self.f)
-
-        self.vao.Use()
-        self.ibo.Use()
+        self.mesh.vao.Use()
 
         glPolygonMode(GL_FRONT_AND_BACK, GL_LINE)
-        glDrawElements(GL_TRIANGLES, self.ibo.count, GL_UNSIGNED_INT, None)
-        glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)      
\ No newline at end of file
+        glDrawElements(GL_TRIANGLES, self.mesh.ibo.count, self.mesh.ibo.type, None)
+        glPolygonMode(GL_FRONT_AND_BACK, GL_FILL)
+
+    def Delete(self):
+        # Hands the mesh back to the pool, the Object must not be drawn afterwards
+        if self.mesh is not None:
+            gpuResources.Release(self.mesh)
+            self.mesh = None
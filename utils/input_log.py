@@ -0,0 +1,100 @@
+import struct
+import time
+import numpy as np
+
+###############################################################
+# Input recording and replay
+#
+# A game is its seed and the stream of frames the window reported: the keys held in each frame and its deltaTime.
+# InputRecorder keeps them as a 16-bit key mask and a float64 per frame (10 bytes) and writes the log in one go when
+# the game ends. InputReplay reads a log back and hands out the same inputs and times frame by frame, so a replayed game
+# runs the exact same ticks and ends in the same state. The log carries the final Simulation.Digest() to check that.
+# The mouse position is not recorded, nothing in the game reads it.
+
+KEYS = ("1", "W", "S", "A", "D", "Q", "E", "SPACE", "L_SHIFT", "R_CLICK", "L_CLICK") # Bit i of the mask is KEYS[i]
+MAGIC = b'SHIL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqI20s') # Magic, version, tick rate, seed, frames, digest of the final state
+FRAME = np.dtype([('keys', '<u2'), ('deltaTime', '<f8')])
+
+def pack_keys(inputs):
+    mask = 0
+    for bit, key in enumerate(KEYS):
+        if inputs[key]:
+            mask |= 1 << bit
+    return mask
+
+def unpack_keys(mask):
+    # An inputs dict as Window.StartFrame() returns it
+    inputs = {key: bool(mask >> bit & 1) for bit, key in enumerate(KEYS)}
+    inputs["mouseDelta"] = [0.0, 0.0]
+    return inputs
+
+class InputRecorder:
+    def __init__(self):
+        self.recording = False
+
+    def Start(self, seed, tickRate):
+        self.seed = seed
+        self.tickRate = tickRate
+        self.keys = []
+        self.deltaTimes = []
+        self.recording = True
+
+    def Record(self, inputs, time):
+        if self.recording:
+            self.keys.append(pack_keys(inputs))
+            self.deltaTimes.append(time["deltaTime"])
+
+    def Stop(self, path, digest):
+        # Writes the log and returns its number of frames (0 if nothing was being recorded)
+        if not self.recording:
+            return 0
+        self.recording = False
+        frames = np.empty(len(self.keys), dtype=FRAME)
+        frames['keys'] = self.keys
+        frames['deltaTime'] = self.deltaTimes
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.tickRate, self.seed, len(frames), digest))
+            file.write(frames.tobytes())
+        return len(frames)
+
+class InputReplay:
+    def __init__(self, path, realTime=False):
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, self.tickRate, self.seed, count, self.digest = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} input log")
+        self.frames = np.frombuffer(data, dtype=FRAME, count=count, offset=HEADER.size)
+        self.realTime = realTime # Wait() holds each frame back to the time it was recorded at
+        self.Rewind()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def Rewind(self):
+        self.frame = 0
+        self.currentTime = 0.0
+        self.startTime = time.perf_counter()
+
+    def Done(self):
+        return self.frame >= len(self.frames)
+
+    def Next(self):
+        # Inputs and time dicts of the next frame, as Window.StartFrame() returns them
+        keys, deltaTime = self.frames[self.frame]
+        self.frame += 1
+        self.currentTime += float(deltaTime)
+        return unpack_keys(int(keys)), {"currentTime": self.currentTime, "deltaTime": float(deltaTime)}
+
+    def Elapsed(self):
+        # Real seconds since the replay started
+        return time.perf_counter() - self.startTime
+
+    def Wait(self):
+        # In real time, sleeps until the current frame is due. As fast as possible, returns straight away.
+        if self.realTime:
+            elapsed = self.Elapsed()
+            if elapsed < self.currentTime:
+                time.sleep(self.currentTime - elapsed)
@@ -0,0 +1,76 @@
+import numpy as np
+
+###############################################################
+# Distance-based level of detail
+#
+# Simplified versions of a mesh are made by vertex clustering when the asset pack is cooked: the mesh's bounding box is
+# cut into a grid of cells, all vertices in a cell are merged into one at their mean, and triangles that lose a corner
+# to the merge (or duplicate another) are dropped. Each level takes the finest grid that brings the mesh down to its
+# share of the full triangle count.
+#
+# At draw time every instance picks a level from its camera distance measured in bounding radii, so big and small
+# meshes switch at the same size on screen. An instance only moves to a coarser level once it is HYSTERESIS further
+# out than the switching distance, and back only once it is that much closer, so objects hovering around a threshold do
+# not pop back and forth every frame.
+
+LOD_TRIANGLES = (0.5, 0.2, 0.05) # Largest fraction of the full mesh's triangles kept by levels 1, 2, 3
+MAX_RESOLUTION = 256 # Grid cells along the longest side of the bounding box, at most
+LOD_DISTANCES = np.array([20.0, 60.0, 150.0]) # Camera distance, in bounding radii, beyond which levels 1, 2, 3 are used
+HYSTERESIS = 0.1 # Fraction of a switching distance to go past before switching
+
+def cluster_decimate(vertices, indices, resolution):
+    # Vertex-clustering simplification of interleaved [x, y, z, ...] vertices and flat triangle indices. Returns new
+    # (vertices, indices) in the same layout, merged vertices take the mean of every attribute in their cell.
+    positions = vertices[:, :3].astype(np.float64)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    cellSize = max((high - low).max(), 1e-9) / resolution
+    cells = np.minimum(((positions - low) / cellSize).astype(np.int64), resolution - 1)
+    cellIds = (cells[:, 0] * resolution + cells[:, 1]) * resolution + cells[:, 2]
+
+    # One vertex per occupied cell
+    occupied, cluster = np.unique(cellIds, return_inverse=True)
+    counts = np.bincount(cluster, minlength=len(occupied)).astype(np.float64)
+    merged = np.empty((len(occupied), vertices.shape[1]), dtype=vertices.dtype)
+    for column in range(vertices.shape[1]):
+        merged[:, column] = np.bincount(cluster, weights=vertices[:, column], minlength=len(occupied)) / counts
+
+    # Triangles whose corners still land in three different cells, each kept once whatever its winding start
+    triangles = cluster[np.asarray(indices).reshape(-1, 3)]
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])]
+    first = np.argmin(triangles, axis=1)[:, np.newaxis]
+    rotated = np.take_along_axis(triangles, (first + np.arange(3)) % 3, axis=1)
+    _, keep = np.unique(rotated, axis=0, return_index=True)
+    triangles = triangles[np.sort(keep)]
+
+    # Drop the clusters no triangle uses any more
+    used, remapped = np.unique(triangles, return_inverse=True)
+    return merged[used], remapped.reshape(-1).astype(np.asarray(indices).dtype)
+
+def build_lods(vertices, indices, fractions=LOD_TRIANGLES):
+    # [(vertices, indices)] of levels 1 and up. Each level bisects the grid resolution for the finest grid that keeps at
+    # most its fraction of the triangles. A level that cannot get below the one before it (a mesh that is already
+    # small) repeats it, so every mesh has the same number of levels.
+    levels = []
+    previous = (vertices, indices)
+    for fraction in fractions:
+        target = int(len(indices) // 3 * fraction)
+        level, low, high = None, 2, MAX_RESOLUTION
+        while low <= high:
+            resolution = (low + high) // 2
+            candidate = cluster_decimate(vertices, indices, resolution)
+            if 0 < len(candidate[1]) // 3 <= target:
+                level, low = candidate, resolution + 1
+            else:
+                high = resolution - 1
+        if level is None or len(level[1]) >= len(previous[1]):
+            level = previous
+        levels.append(level)
+        previous = level
+    return levels
+
+def select_lods(distances, current, distancesPerLevel=LOD_DISTANCES, hysteresis=HYSTERESIS):
+    # Levels for instances at the given distances (in bounding radii) that were drawn at the current levels last frame.
+    # An instance must be past a switching distance by the hysteresis margin to cross it, in either direction.
+    coarsest = np.searchsorted(distancesPerLevel * (1.0 - hysteresis), distances) # Every level closer than this is allowed
+    finest = np.searchsorted(distancesPerLevel * (1.0 + hysteresis), distances) # Levels finer than this are too close
+    return np.clip(current, finest, coarsest)
@@ -0,0 +1,111 @@
+import numpy as np
+
+###############################################################
+# Mesh optimization (run on every mesh and level of detail when the asset pack is cooked)
+#
+# load_obj emits one vertex per 'v' line with a colour attribute and int32 indices. The meshes drawn from the pack only
+# read positions, so the colours are stripped, vertices that end up identical are merged, and triangles that collapse
+# in the merge are dropped. Triangles are then reordered for the post-transform vertex cache with Tipsify (Sander,
+# Nehab and Barczak, "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", 2007), vertices are renumbered
+# in the order the new index buffer first reads them so that fetches walk the vertex buffer forwards, and indices are
+# stored as uint16 whenever the mesh has few enough vertices.
+
+POSITION_COMPONENTS = 3 # Floats per vertex read by the shaders that draw pack meshes
+CACHE_SIZE = 16 # Post-transform cache entries assumed by the reordering and by cache_miss_ratio
+
+def strip_attributes(vertices, components=POSITION_COMPONENTS):
+    # Leading components of interleaved vertices, the rest is dropped
+    return np.ascontiguousarray(np.asarray(vertices)[:, :components])
+
+def weld_vertices(vertices, indices):
+    # Merges bit-identical vertices and drops the vertices no triangle uses and the triangles left with a repeated corner
+    unique, remap = np.unique(vertices, axis=0, return_inverse=True)
+    triangles = remap.reshape(-1)[np.asarray(indices).reshape(-1, 3)]
+    triangles = triangles[(triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & (triangles[:, 0] != triangles[:, 2])]
+    used, triangles = np.unique(triangles, return_inverse=True)
+    return unique[used], triangles.reshape(-1)
+
+def optimize_vertex_cache(indices, vertexCount, cacheSize=CACHE_SIZE):
+    # Tipsify: fans out around one vertex at a time, emitting all of its remaining triangles, then moves to the
+    # neighbour that is still in the cache and has the most triangles left, or back to a recent vertex at a dead end.
+    # Runs in time linear in the number of triangles.
+    triangles = np.asarray(indices).reshape(-1, 3)
+    corners = triangles.reshape(-1)
+    byVertex = np.argsort(corners, kind='stable')
+    adjacency = (byVertex // 3).tolist()
+    adjacencyStart = np.searchsorted(corners[byVertex], np.arange(vertexCount + 1)).tolist()
+    live = np.bincount(corners, minlength=vertexCount).tolist()
+    triangleList = triangles.tolist()
+
+    cacheTime = [0] * vertexCount
+    emitted = [False] * len(triangleList)
+    deadEnd = []
+    order = []
+    time = cacheSize + 1
+    cursor = 0
+    fan = 0 if vertexCount else -1
+    while fan >= 0:
+        candidates = []
+        for triangle in adjacency[adjacencyStart[fan]:adjacencyStart[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in triangleList[triangle]:
+                deadEnd.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if time - cacheTime[vertex] > cacheSize:
+                    cacheTime[vertex] = time
+                    time += 1
+
+        # Next fan: the candidate that will still be cached after its remaining triangles, oldest first
+        fan, best = -1, -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                priority = time - cacheTime[vertex] if time - cacheTime[vertex] + 2 * live[vertex] <= cacheSize else 0
+                if priority > best:
+                    fan, best = vertex, priority
+        if fan < 0:
+            while deadEnd and fan < 0:
+                vertex = deadEnd.pop()
+                if live[vertex] > 0:
+                    fan = vertex
+            while fan < 0 and cursor < vertexCount:
+                if live[cursor] > 0:
+                    fan = cursor
+                cursor += 1
+    return triangles[order].reshape(-1)
+
+def optimize_vertex_fetch(vertices, indices):
+    # Renumbers vertices in the order the indices first reference them
+    first = np.unique(indices, return_index=True)[1]
+    order = np.asarray(indices)[np.sort(first)]
+    remap = np.empty(len(vertices), dtype=np.int64)
+    remap[order] = np.arange(len(order))
+    return vertices[order], remap[indices]
+
+def compact_indices(indices, vertexCount):
+    # uint16 when every vertex can be addressed with it, uint32 otherwise
+    dtype = np.uint16 if vertexCount <= np.iinfo(np.uint16).max + 1 else np.uint32
+    return np.ascontiguousarray(indices, dtype=dtype)
+
+def cache_miss_ratio(indices, cacheSize=CACHE_SIZE):
+    # Average vertex transforms per triangle (ACMR) with a FIFO post-transform cache: 3 with no reuse at all, around 0.6
+    # to 0.7 for a well ordered closed mesh
+    cache = []
+    misses = 0
+    for vertex in np.asarray(indices).tolist():
+        if vertex not in cache:
+            misses += 1
+            cache.append(vertex)
+            if len(cache) > cacheSize:
+                cache.pop(0)
+    return misses / max(len(indices) // 3, 1)
+
+def optimize_mesh(vertices, indices, components=POSITION_COMPONENTS):
+    # The whole pass: (vertices, indices) with only the used attributes, no duplicates, cache ordered, compact indices
+    vertices, indices = weld_vertices(strip_attributes(vertices, components), indices)
+    indices = optimize_vertex_cache(indices, len(vertices))
+    vertices, indices = optimize_vertex_fetch(vertices, indices)
+    return np.ascontiguousarray(vertices, dtype=np.float32), compact_indices(indices, len(vertices))
@@ -0,0 +1,148 @@
+import numpy as np
+
+###############################################################
+# OBJ parsing (kept free of OpenGL so it can be used by the asset cook step)
+#
+# The file is tokenized in bulk on its raw bytes: lines are classified by their first bytes, the bodies of all lines of
+# one keyword are gathered with a single mask and converted with one NumPy call, and polygon faces are fan-triangulated
+# with index arithmetic instead of a per-line Python loop.
+
+SPACE, TAB, LF, CR, SLASH, ZERO, DOT, MINUS = 32, 9, 10, 13, 47, 48, 46, 45
+
+def _is_space(buffer):
+    return (buffer == SPACE) | (buffer == TAB) | (buffer == LF) | (buffer == CR)
+
+def _parse_numbers(body, dtype):
+    # body: uint8 bytes of whitespace separated numbers
+    return np.fromstring(body.tobytes(), dtype=dtype, sep=' ')
+
+def _parse_decimals(body):
+    # Plain decimals ('-0.054669') are parsed as integers with the point removed and scaled back, which is much faster
+    # than float parsing. With at most 15 significant digits both operands are exact doubles, so the division rounds
+    # exactly like float('-0.054669') does. Anything else (exponents, long mantissas) goes through the float parser.
+    space = _is_space(body)
+    tokenStart = ~space
+    tokenStart[1:] &= space[:-1]
+    tokenEnd = ~space
+    tokenEnd[:-1] &= space[1:]
+    starts, ends = np.flatnonzero(tokenStart), np.flatnonzero(tokenEnd)
+    points = np.flatnonzero(body == DOT)
+    digits = (body >= ZERO) & (body <= ZERO + 9)
+    if len(points) != len(starts) or np.any((points < starts) | (points > ends)) or \
+            not np.all(digits | space | (body == DOT) | (body == MINUS)) or np.any(ends - starts > 16):
+        return _parse_numbers(body, np.float64)
+    mantissas = _parse_numbers(body[body != DOT], np.int64)
+    magnitudes = np.abs(mantissas) / 10.0 ** (ends - points)
+    return np.where(body[starts] == MINUS, -magnitudes, magnitudes)
+
+def _parse_vectors(body, count, width):
+    # Extra components (e.g. the optional w of 'v x y z w') are dropped, missing ones are 0
+    values = _parse_decimals(body)
+    if values.size == count * width:
+        return values.reshape(count, width).astype(np.float32)
+    rows = [line.split()[:width] for line in body.tobytes().splitlines() if line.strip()]
+    rows = [row + [b'0'] * (width - len(row)) for row in rows]
+    return np.array(rows, dtype=np.float64).reshape(-1, width).astype(np.float32)
+
+def _parse_corners(body, lineLengths):
+    # Splits face bodies into corners 'v', 'v/vt', 'v//vn' or 'v/vt/vn'.
+    # Returns (corners, 3) OBJ indices with 0 for missing fields, and the number of corners of each face.
+    space = _is_space(body)
+    cornerStart = ~space
+    cornerStart[1:] &= space[:-1]
+    cornerStarts = np.flatnonzero(cornerStart)
+    cornersPerFace = np.diff(np.searchsorted(cornerStarts, np.append(np.cumsum(lineLengths) - lineLengths, len(body))))
+    cornerCount = len(cornerStarts)
+
+    slash = body == SLASH
+    slashesPerCorner = np.diff(np.searchsorted(np.flatnonzero(slash), np.append(cornerStarts, len(body))))
+    doubleSlashCount = int((slash[:-1] & slash[1:]).sum())
+    numbers = np.where(slash, SPACE, body).astype(np.uint8)
+
+    # Fast path: every corner uses the same form, so the numbers reshape directly into fields
+    for slashes, doubles, fields in ((0, 0, (0,)), (1, 0, (0, 1)), (2, 1, (0, 2)), (2, 0, (0, 1, 2))):
+        if np.all(slashesPerCorner == slashes) and doubleSlashCount == doubles * cornerCount:
+            values = _parse_numbers(numbers, np.int64)
+            if values.size == cornerCount * len(fields):
+                corners = np.zeros((cornerCount, 3), dtype=np.int64)
+                corners[:, fields] = values.reshape(cornerCount, len(fields))
+                return corners, cornersPerFace
+
+    # Mixed forms: give empty fields ('a//c', trailing 'a/') an explicit 0 so every field parses to one number
+    fieldsPerCorner = np.minimum(slashesPerCorner + 1, 3)
+    following = np.append(body[1:], SPACE)
+    empty = slash & ((following == SLASH) | _is_space(following))
+    numbers = np.insert(body, np.flatnonzero(empty) + 1, ZERO)
+    numbers[numbers == SLASH] = SPACE
+    values = _parse_numbers(numbers, np.int64)
+
+    corners = np.zeros((cornerCount, 3), dtype=np.int64)
+    cornerOfValue = np.repeat(np.arange(cornerCount), fieldsPerCorner)
+    fieldOfValue = np.arange(len(values)) - np.repeat(np.cumsum(fieldsPerCorner) - fieldsPerCorner, fieldsPerCorner)
+    corners[cornerOfValue, fieldOfValue] = values
+    return corners, cornersPerFace
+
+def parse_obj(filepath, attributes=('v', 'vt', 'vn')):
+    # Returns positions 'v', normals 'vn', texture coordinates 'vt' (only those listed in attributes are converted) and
+    # triangulated face corners 'faces', an int32 (triangles, 3, 3) array of 0-based [v, vt, vn] indices per corner
+    # (-1 where the face has no such field)
+    with open(filepath, 'rb') as file:
+        buffer = np.frombuffer(file.read(), dtype=np.uint8)
+
+    lineStarts = np.concatenate(([0], np.flatnonzero(buffer[:-1] == LF) + 1)) if len(buffer) else np.zeros(0, dtype=np.int64)
+    lineLengths = np.diff(np.append(lineStarts, len(buffer)))
+
+    # Keyword of every line from its first three bytes
+    bodies = np.concatenate((buffer, np.zeros(3, dtype=np.uint8)))
+    c0, c1, c2 = bodies[lineStarts], bodies[lineStarts + 1], bodies[lineStarts + 2]
+    separated1 = (c1 == SPACE) | (c1 == TAB)
+    separated2 = (c2 == SPACE) | (c2 == TAB)
+    keywords = {
+        'v': (c0 == ord('v')) & separated1,
+        'vt': (c0 == ord('v')) & (c1 == ord('t')) & separated2,
+        'vn': (c0 == ord('v')) & (c1 == ord('n')) & separated2,
+        'f': (c0 == ord('f')) & separated1
+    }
+
+    # Blank out the keywords so that each line is left with just its body, and tag every byte with its line's keyword
+    bodies[lineStarts[keywords['v'] | keywords['vt'] | keywords['vn'] | keywords['f']]] = SPACE
+    bodies[lineStarts[keywords['vt'] | keywords['vn']] + 1] = SPACE
+    bodies = bodies[:len(buffer)]
+    lineKeywords = np.zeros(len(lineStarts), dtype=np.uint8)
+    for code, keyword in enumerate(('v', 'vt', 'vn', 'f'), start=1):
+        lineKeywords[keywords[keyword]] = code
+    byteKeywords = np.repeat(lineKeywords, lineLengths)
+
+    mesh = {}
+    for code, keyword, width in ((1, 'v', 3), (2, 'vt', 2), (3, 'vn', 3)):
+        if keyword not in attributes:
+            continue
+        mesh[keyword] = _parse_vectors(bodies[byteKeywords == code], int(keywords[keyword].sum()), width)
+
+    isFace = keywords['f']
+    faceCount = int(isFace.sum())
+    if faceCount == 0:
+        mesh['faces'] = np.zeros((0, 3, 3), dtype=np.int32)
+        return mesh
+    corners, cornersPerFace = _parse_corners(bodies[byteKeywords == 4], lineLengths[isFace])
+    faceOfCorner = np.repeat(np.arange(faceCount), cornersPerFace)
+
+    # OBJ indices are 1-based, negative ones count back from the elements defined before the face (0 marks a missing field)
+    definedBefore = np.stack([np.cumsum(keywords[keyword])[isFace] for keyword in ('v', 'vt', 'vn')], axis=1)
+    resolved = np.where(corners < 0, definedBefore[faceOfCorner] + corners, corners - 1).astype(np.int32)
+
+    # Fan triangulation: corners (0, j, j + 1) for j in 1 .. n - 2 of every face
+    trianglesPerFace = np.maximum(cornersPerFace - 2, 0)
+    firstCorner = np.cumsum(cornersPerFace) - cornersPerFace
+    first = np.repeat(firstCorner, trianglesPerFace)
+    j = np.arange(trianglesPerFace.sum()) - np.repeat(np.cumsum(trianglesPerFace) - trianglesPerFace, trianglesPerFace) + 1
+    mesh['faces'] = resolved[np.stack([first, first + j, first + j + 1], axis=1)]
+    return mesh
+
+def load_obj(filepath, colors):
+    # Interleaved [x, y, z, r, g, b] vertices (colours cycled per vertex) and flat int32 triangle indices
+    mesh = parse_obj(filepath, attributes=('v',))
+    vertexColours = np.array(colors, dtype=np.float32)[np.arange(len(mesh['v'])) % len(colors)]
+    vertices = np.concatenate((mesh['v'], vertexColours), axis=1)
+    faces = mesh['faces'][:, :, 0].flatten()
+    return vertices, faces
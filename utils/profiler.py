@@ -0,0 +1,208 @@
+import collections
+import json
+import time
+import numpy as np
+
+###############################################################
+# Per-phase frame profiler
+#
+# Begin(name) / End() (or a with Scope(name) block) time a phase of the frame, phases nest. EndFrame() moves the
+# frame's phases into a ring buffer of the last `frames` frames, from which Stats() gives per-phase percentiles of the
+# time per frame, DrawOverlay() shows them in an ImGui window and ExportChromeTrace() writes the whole capture as
+# Chrome trace events (open in chrome://tracing or ui.perfetto.dev). Count(name, value) records a per-frame counter
+# (objects drawn, triangles, ...) that is shown and exported along with the phases. While disabled every call returns
+# straight away.
+#
+# FrameCounters sums named counters over a frame whether or not the profiler is on (draw calls, uniform uploads, objects
+# culled...), hands each frame's values to the profiler as counters and reports their means over the whole run at exit.
+
+class NullScope:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+class Scope:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.Begin(self.name)
+        return self
+
+    def __exit__(self, *exception):
+        self.profiler.End()
+        return False
+
+NULL_SCOPE = NullScope()
+
+class FrameProfiler:
+    def __init__(self, frames=300, refresh=15):
+        self.enabled = False
+        self.history = collections.deque(maxlen=frames) # (frame start, frame end, [(name, depth, start, end), ...], {counter: value})
+        self.refresh = refresh # Frames between recomputations of the overlay's statistics
+        self.Reset()
+
+    def Reset(self, frames=None):
+        # Also resizes the ring buffer when given a number of frames
+        if frames is not None:
+            self.history = collections.deque(maxlen=frames)
+        self.history.clear()
+        self.events = []
+        self.stack = []
+        self.counters = {}
+        self.frameStart = time.perf_counter()
+        self.stats = []
+        self.counterStats = []
+        self.statsAge = self.refresh
+
+    def Enable(self, enabled=True):
+        # Starts a fresh capture when switched on
+        if enabled and not self.enabled:
+            self.Reset()
+        self.enabled = enabled
+
+    def Begin(self, name):
+        if self.enabled:
+            self.stack.append((name, time.perf_counter()))
+
+    def End(self):
+        if self.enabled and self.stack:
+            name, start = self.stack.pop()
+            self.events.append((name, len(self.stack), start, time.perf_counter()))
+
+    def Count(self, name, value):
+        if self.enabled:
+            self.counters[name] = value
+
+    def Scope(self, name):
+        return Scope(self, name) if self.enabled else NULL_SCOPE
+
+    def EndFrame(self):
+        if not self.enabled:
+            return
+        end = time.perf_counter()
+        self.history.append((self.frameStart, end, self.events, self.counters))
+        self.events = []
+        self.stack = []
+        self.counters = {}
+        self.frameStart = end
+        self.statsAge += 1
+
+    def Stats(self):
+        # [(name, depth, mean, p50, p95, p99, max)] in milliseconds per frame, phases in the order they first started and
+        # 'frame' (the whole frame) first. A phase that runs several times in a frame (once per tick) counts its total.
+        frames = len(self.history)
+        if frames == 0:
+            return []
+        order = {'frame': 0}
+        totals = collections.defaultdict(lambda: [0.0] * frames)
+        for index, (frameStart, frameEnd, events, counters) in enumerate(self.history):
+            totals['frame'][index] = frameEnd - frameStart
+            for name, depth, start, end in sorted(events, key=lambda event: event[2]):
+                order.setdefault(name, depth + 1)
+                totals[name][index] += end - start
+        stats = []
+        for name, depth in order.items():
+            milliseconds = np.array(totals[name]) * 1000.0
+            p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+            stats.append((name, depth, milliseconds.mean(), p50, p95, p99, milliseconds.max()))
+        return stats
+
+    def CounterStats(self):
+        # [(name, last, mean, max)] of every counter, over the frames that recorded it
+        values = collections.defaultdict(list)
+        for frameStart, frameEnd, events, counters in self.history:
+            for name, value in counters.items():
+                values[name].append(value)
+        return [(name, samples[-1], sum(samples) / len(samples), max(samples)) for name, samples in values.items()]
+
+    def ExportChromeTrace(self, path):
+        # Complete ('X') events in microseconds since the first captured frame, one track
+        if not self.history:
+            return 0
+        origin = self.history[0][0]
+        def event(name, start, end):
+            return {"name": name, "cat": "frame", "ph": "X", "pid": 0, "tid": 0,
+                    "ts": (start - origin) * 1e6, "dur": (end - start) * 1e6}
+        traceEvents = []
+        for frameStart, frameEnd, events, counters in self.history:
+            traceEvents.append(event('frame', frameStart, frameEnd))
+            traceEvents += [event(name, start, end) for name, depth, start, end in events]
+            traceEvents += [{"name": name, "ph": "C", "pid": 0, "ts": (frameStart - origin) * 1e6, "args": {name: value}}
+                            for name, value in counters.items()]
+        with open(path, 'w') as file:
+            json.dump({"traceEvents": traceEvents, "displayTimeUnit": "ms"}, file)
+        return len(traceEvents)
+
+    def DrawOverlay(self, tracePath='frame_trace.json'):
+        # ImGui window with the phase statistics, call between imgui.new_frame() and imgui.render()
+        import imgui
+        if self.statsAge >= self.refresh:
+            self.stats = self.Stats()
+            self.counterStats = self.CounterStats()
+            self.statsAge = 0
+
+        imgui.set_next_window_position(10, 10, imgui.FIRST_USE_EVER)
+        imgui.set_next_window_size(520, 80 + 18 * (len(self.stats) + len(self.counterStats)), imgui.FIRST_USE_EVER)
+        imgui.begin("Profiler")
+        imgui.text(f"last {len(self.history)} frames, ms per frame")
+        imgui.columns(6)
+        for heading in ("phase", "mean", "p50", "p95", "p99", "max"):
+            imgui.text(heading)
+            imgui.next_column()
+        for name, depth, *values in self.stats:
+            imgui.text("  " * depth + name)
+            imgui.next_column()
+            for value in values:
+                imgui.text(f"{value:.2f}")
+                imgui.next_column()
+        imgui.columns(1)
+        if self.counterStats:
+            imgui.separator()
+            imgui.columns(4)
+            for heading in ("counter", "last", "mean", "max"):
+                imgui.text(heading)
+                imgui.next_column()
+            for name, *values in self.counterStats:
+                imgui.text(name)
+                imgui.next_column()
+                for value in values:
+                    imgui.text(f"{value:.0f}")
+                    imgui.next_column()
+            imgui.columns(1)
+        if imgui.button("Save Chrome trace"):
+            count = self.ExportChromeTrace(tracePath)
+            print(f"Saved {count} trace events to {tracePath}")
+        imgui.end()
+
+frameProfiler = FrameProfiler()
+
+class FrameCounters:
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.current = {} # Counter: sum over the current frame
+        self.last = {}
+        self.totals = {} # In the order the counters were first added to
+        self.frames = 0
+
+    def Add(self, name, value=1):
+        self.current[name] = self.current.get(name, 0) + value
+
+    def EndFrame(self):
+        # Call once per frame, before the profiler's EndFrame()
+        for name, value in self.current.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+            self.profiler.Count(name, value)
+        self.last, self.current = self.current, {}
+        self.frames += 1
+
+    def Report(self):
+        if self.frames == 0 or not self.totals:
+            return
+        print("Per frame (last frame): " + ", ".join(f"{name} {total / self.frames:.1f} ({self.last.get(name, 0)})"
+                                                     for name, total in self.totals.items()))
+
+frameCounters = FrameCounters(frameProfiler)
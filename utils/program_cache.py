@@ -0,0 +1,131 @@
+import hashlib
+import os
+import struct
+import time
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.error import GLError
+from OpenGL.GL.shaders import compileShader
+
+###############################################################
+# Shader program binary cache
+#
+# Linked programs are saved with glGetProgramBinary and loaded back with glProgramBinary on later runs, which skips
+# compiling and linking the GLSL. A binary is only valid for the driver that produced it, so the file is named after a
+# hash of both shader sources and of the GL vendor, renderer and version strings: a driver update or an edited shader
+# simply misses the cache. A binary the driver refuses anyway (it may, e.g. after a GPU change) is deleted and the
+# program compiled from source, as it is when the driver offers no binary formats at all.
+#
+# File layout (little endian): magic, binary format, then the binary as GL returned it.
+
+PROGRAM_MAGIC = b'SHPB'
+PROGRAM_HEADER = struct.Struct('<4sI')
+
+def compile_program(vertexSource, fragmentSource, retrievable=False):
+    # Compiles and links a program, raising RuntimeError with the info log if linking fails. retrievable asks the driver
+    # to keep the binary available to glGetProgramBinary.
+    shaders = [compileShader(vertexSource, GL_VERTEX_SHADER), compileShader(fragmentSource, GL_FRAGMENT_SHADER)]
+    program = glCreateProgram()
+    for shader in shaders:
+        glAttachShader(program, shader)
+    if retrievable:
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+    glLinkProgram(program)
+    for shader in shaders:
+        glDetachShader(program, shader)
+        glDeleteShader(shader)
+    if glGetProgramiv(program, GL_LINK_STATUS) != GL_TRUE:
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"Link failure: {log.decode('utf-8', 'replace') if isinstance(log, bytes) else log}")
+    return program
+
+class ProgramCache:
+    def __init__(self, cacheDir):
+        self.cacheDir = cacheDir
+        self.driver = None # GL vendor, renderer and version, read once a context exists
+        self.supported = None
+        self.loaded = 0
+        self.compiled = 0
+        self.rejected = 0
+        self.seconds = 0.0 # Spent in Load()
+
+    def _Driver(self):
+        if self.driver is None:
+            self.driver = b'\0'.join(glGetString(name) or b'' for name in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+            self.supported = bool(glGetProgramBinary) and bool(glProgramBinary) and glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+        return self.driver
+
+    def Path(self, vertexSource, fragmentSource):
+        sha1 = hashlib.sha1()
+        for part in (vertexSource.encode('utf-8'), fragmentSource.encode('utf-8'), self._Driver()):
+            sha1.update(struct.pack('<Q', len(part)))
+            sha1.update(part)
+        return os.path.join(self.cacheDir, sha1.hexdigest() + '.bin')
+
+    def Load(self, vertexSource, fragmentSource):
+        # A linked program for the sources, from the cache if it holds one this driver accepts, compiled otherwise
+        start = time.perf_counter()
+        path = self.Path(vertexSource, fragmentSource)
+        program = self._LoadBinary(path) if self.supported else None
+        if program is None:
+            program = compile_program(vertexSource, fragmentSource, retrievable=self.supported)
+            self.compiled += 1
+            if self.supported:
+                self._SaveBinary(path, program)
+        else:
+            self.loaded += 1
+        self.seconds += time.perf_counter() - start
+        return program
+
+    def _LoadBinary(self, path):
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            magic, binaryFormat = PROGRAM_HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        program = glCreateProgram()
+        if magic == PROGRAM_MAGIC:
+            binary = np.frombuffer(data, dtype=np.uint8, offset=PROGRAM_HEADER.size)
+            try:
+                # A format the driver no longer accepts is a GL error (GL_INVALID_ENUM) rather than a failed link
+                glProgramBinary(program, binaryFormat, binary, len(binary))
+                linked = glGetProgramiv(program, GL_LINK_STATUS) == GL_TRUE
+            except GLError:
+                linked = False
+            if linked:
+                return program
+        glDeleteProgram(program)
+        self.rejected += 1
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    def _SaveBinary(self, path, program):
+        # Best effort, a program that cannot be cached is simply compiled again next time
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if length <= 0:
+            return
+        binary = np.empty(length, dtype=np.uint8)
+        written, binaryFormat = GLsizei(0), GLenum(0)
+        glGetProgramBinary(program, length, written, binaryFormat, binary)
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            tmpPath = path + '.tmp'
+            with open(tmpPath, 'wb') as file:
+                file.write(PROGRAM_HEADER.pack(PROGRAM_MAGIC, binaryFormat.value))
+                file.write(binary[:written.value].tobytes())
+            os.replace(tmpPath, path)
+        except OSError:
+            pass
+
+    def Report(self):
+        if self.loaded + self.compiled == 0:
+            return
+        print(f"Shader programs: {self.loaded} loaded from the binary cache, {self.compiled} compiled"
+              f"{f', {self.rejected} cached binaries rejected by the driver' if self.rejected else ''} ({self.seconds * 1000:.1f} ms)")
+
+programCache = ProgramCache('./assets/shaders/cache')
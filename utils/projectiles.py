@@ -0,0 +1,68 @@
+import numpy as np
+from utils.transforms import model_matrices, norms
+
+###############################################################
+# Fixed-capacity projectile pool
+#
+# All arrays are allocated up front and live projectiles are packed into rows [0, count) in the order they were fired,
+# so moving them is one array operation and despawning is one compaction, whatever the number of projectiles. When
+# the pool is full the oldest projectile makes room for the new one.
+
+class ProjectilePool:
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 3), dtype=np.float64)
+        self.previousPosition = np.zeros((capacity, 3), dtype=np.float64) # At the start of the last tick
+        self.velocity = np.zeros((capacity, 3), dtype=np.float64)
+        self.rotation = np.zeros((capacity, 3), dtype=np.float64)
+        self.colour = np.zeros((capacity, 4), dtype=np.float32)
+        self.spawnTime = np.zeros(capacity, dtype=np.float64)
+        self.scale = np.ones((capacity, 3), dtype=np.float64)
+
+    def Columns(self):
+        return ('position', 'previousPosition', 'velocity', 'rotation', 'colour', 'spawnTime')
+
+    def Spawn(self, position, velocity, rotation, colour, spawnTime):
+        if self.count == self.capacity:
+            self.Keep(np.arange(self.count) > 0)
+        row = self.count
+        self.position[row], self.velocity[row], self.rotation[row] = position, velocity, rotation
+        self.previousPosition[row] = self.position[row]
+        self.colour[row] = colour
+        self.spawnTime[row] = spawnTime
+        self.count += 1
+
+    def SavePositions(self):
+        # Call at the start of every tick, before Advance()
+        self.previousPosition[:self.count] = self.position[:self.count]
+
+    def Advance(self, deltaTime):
+        self.position[:self.count] += self.velocity[:self.count] * deltaTime
+
+    def Expired(self, currentTime, timeToLive, reference, maxDistance):
+        # Older than timeToLive, or farther than maxDistance from the reference point
+        live = slice(0, self.count)
+        distances = norms(self.position[live] - reference)
+        return (currentTime - self.spawnTime[live] > timeToLive) | (distances > maxDistance)
+
+    def Keep(self, mask):
+        # Compacts the pool down to the rows where mask is set, keeping their order
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for name in self.Columns():
+            column = getattr(self, name)
+            column[:kept] = column[:self.count][mask]
+        self.count = kept
+
+    def Clear(self):
+        self.count = 0
+
+    def ModelMatrices(self, alpha=1.0):
+        # Drawn between the start (alpha 0) and the end (alpha 1) of the last tick
+        live = slice(0, self.count)
+        position = self.position[live]
+        if alpha < 1.0:
+            position = self.previousPosition[live] + alpha * (position - self.previousPosition[live])
+        return model_matrices(position, self.rotation[live], self.scale[live])
@@ -0,0 +1,60 @@
+from OpenGL.GL import *
+from utils.profiler import frameCounters
+
+###############################################################
+# State-sorted render queue
+#
+# Draws are not issued where the scene code decides on them: they are submitted as items with a sort key
+# (pass, program, depth, mesh) and issued in key order when the frame is flushed. Items that share a program are drawn
+# together, so a program is only bound when it actually changes, and so is a vertex array. Meshes keep their index
+# buffer in their vertex array (see VAO in utils/graphics.py), so a draw needs no other bind.
+#
+# Within a program, opaque items sort front to back on their depth (camera distance) ahead of their mesh, so that the
+# depth test rejects hidden fragments before they are shaded. Vertex array binds are cheap next to that overdraw, and
+# every mesh is submitted once per frame here anyway (one instanced batch per mesh and level), so the order costs no
+# extra bind. Instanced batches also sort their instances front to back (see InstanceBatch.Submit). Overlay items (the
+# HUD, drawn on top of the scene) come after every opaque one, in submission order.
+
+OPAQUE, OVERLAY = 0, 1 # Passes, flushed in this order
+
+class RenderQueue:
+    def __init__(self):
+        self.items = []
+
+    def Submit(self, shader, vao, ibo, depth=0.0, uniforms=None, instances=0, renderPass=OPAQUE):
+        # uniforms: optional callable that sets the item's uniforms on the shader, called once the program is in use.
+        # instances: number of instances for an instanced draw, 0 for a plain one.
+        if renderPass == OVERLAY:
+            depth = 0.0 # Keeps submission order
+        key = (renderPass, shader.ID, depth, vao.vao, len(self.items))
+        self.items.append((key, shader, vao, ibo, uniforms, instances))
+
+    def Flush(self):
+        # Issues the submitted draws in key order, then empties the queue. Nothing is assumed about the bindings other
+        # code left behind (e.g. ImGui), so the first program and vertex array of a frame are always bound.
+        self.items.sort(key=lambda item: item[0])
+        program = vertexArray = None
+        for key, shader, vao, ibo, uniforms, instances in self.items:
+            if shader.ID != program:
+                glUseProgram(shader.ID)
+                program = shader.ID
+                frameCounters.Add('program binds')
+            else:
+                frameCounters.Add('redundant binds skipped')
+            if vao.vao != vertexArray:
+                glBindVertexArray(vao.vao)
+                vertexArray = vao.vao
+                frameCounters.Add('VAO binds')
+            else:
+                frameCounters.Add('redundant binds skipped')
+            if uniforms is not None:
+                uniforms(shader)
+            if instances:
+                glDrawElementsInstanced(GL_TRIANGLES, ibo.count, ibo.type, None, instances)
+            else:
+                glDrawElements(GL_TRIANGLES, ibo.count, ibo.type, None)
+            frameCounters.Add('draw calls')
+        self.items.clear()
+
+    def Clear(self):
+        self.items.clear()
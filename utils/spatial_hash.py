@@ -0,0 +1,89 @@
+import numpy as np
+
+###############################################################
+# Uniform grid spatial hash
+#
+# The world cube is divided into cells of cellSize. Build() sorts the entities by the key of their cell (no per-cell
+# lists and no dense cell table, a 1000^3 world in 5.0 cells would have 8 million of them), and queries look up the
+# cells around each query point with a binary search on the sorted keys. Everything is vectorized over query points.
+# Positions outside the world cube are clamped into its border cells, which keeps the queries correct, just slower
+# if many entities stray far outside.
+
+class SpatialHash:
+    def __init__(self, worldMin, worldMax, cellSize):
+        self.worldMin = np.asarray(worldMin, dtype=np.float64)
+        self.cellSize = float(cellSize)
+        self.dims = np.maximum(np.ceil((np.asarray(worldMax, dtype=np.float64) - self.worldMin) / self.cellSize), 1).astype(np.int64)
+        self.positions = np.zeros((0, 3), dtype=np.float64)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.keys = np.zeros(0, dtype=np.int64)
+
+    def Cells(self, points):
+        cells = np.floor((points - self.worldMin) / self.cellSize).astype(np.int64)
+        return np.clip(cells, 0, self.dims - 1)
+
+    def Keys(self, cells):
+        return (cells[..., 0] * self.dims[1] + cells[..., 1]) * self.dims[2] + cells[..., 2]
+
+    def Build(self, positions):
+        # Rebuilt from scratch every tick, an argsort of the cell keys
+        self.positions = np.asarray(positions, dtype=np.float64)
+        keys = self.Keys(self.Cells(self.positions))
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        return self
+
+    def Neighbours(self, points, radius):
+        # Index pairs (point, entity) with |points[point] - positions[entity]| < radius
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if len(points) == 0 or len(self.positions) == 0:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+        # Cells within reach of every point, per axis: if the sphere fits in half a cell it only reaches into the
+        # neighbour on the side of the cell the point is in (2 cells per axis), otherwise every cell within reach
+        relative = (points - self.worldMin) / self.cellSize
+        cells = np.clip(np.floor(relative).astype(np.int64), 0, self.dims - 1)
+        if 2.0 * radius <= self.cellSize:
+            side = np.where(relative - cells >= 0.5, 1, -1)
+            steps = np.stack([cells, cells + side], axis=1) # (points, 2, axes)
+        else:
+            reach = int(np.ceil(radius / self.cellSize))
+            steps = cells[:, np.newaxis, :] + np.arange(-reach, reach + 1)[np.newaxis, :, np.newaxis]
+        valid = (steps >= 0) & (steps < self.dims)
+        strides = np.array([self.dims[1] * self.dims[2], self.dims[2], 1], dtype=np.int64)
+        axisKeys = steps * strides
+        keys = axisKeys[:, :, np.newaxis, np.newaxis, 0] + axisKeys[:, np.newaxis, :, np.newaxis, 1] + axisKeys[:, np.newaxis, np.newaxis, :, 2]
+        inside = valid[:, :, np.newaxis, np.newaxis, 0] & valid[:, np.newaxis, :, np.newaxis, 1] & valid[:, np.newaxis, np.newaxis, :, 2]
+        pointOfCell = np.nonzero(inside)[0]
+        keys = keys[inside]
+
+        # Entities of those cells, as ranges of the sorted keys
+        starts = np.searchsorted(self.keys, keys, side='left')
+        counts = np.searchsorted(self.keys, keys, side='right') - starts
+        point = np.repeat(pointOfCell, counts)
+        entity = self.order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - starts, counts)]
+
+        offsets = points[point] - self.positions[entity]
+        within = np.sqrt(np.einsum('ij,ij->i', offsets, offsets)) < radius
+        return point[within], entity[within]
+
+    def Pairs(self, radius):
+        # Index pairs (i, j), i < j, of built entities closer than radius
+        i, j = self.Neighbours(self.positions, radius)
+        return i[i < j], j[i < j]
+
+# Below this many candidate pairs, checking all of them is cheaper than building a grid
+DENSE_PAIRS = 4096
+
+def pairs_within(a, b, radius, worldMin=None, worldMax=None):
+    # Pairs (i, j) with |a[i] - b[j]| < radius through a hash of b with cells of twice the radius (8 cells per query).
+    # Without world bounds the grid covers the bounding box of both sets.
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    if len(a) * len(b) <= DENSE_PAIRS:
+        offsets = a[:, np.newaxis, :] - b[np.newaxis, :, :]
+        return np.nonzero(np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets)) < radius)
+    if worldMin is None:
+        worldMin = np.minimum(a.min(axis=0), b.min(axis=0))
+        worldMax = np.maximum(a.max(axis=0), b.max(axis=0))
+    return SpatialHash(worldMin, worldMax, 2.0 * radius).Build(b).Neighbours(a, radius)
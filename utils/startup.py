@@ -0,0 +1,39 @@
+import time
+
+###############################################################
+# Startup time breakdown
+#
+# Import this module first so that its import time approximates process start. Mark() closes a phase, Report() prints
+# the phases, any background asset loads and whether time-to-first-frame (the 'first frame' mark) stayed within the budget.
+
+class StartupProfile:
+    def __init__(self, budget=0.5):
+        self.start = time.perf_counter()
+        self.budget = budget # Time-to-first-frame budget in seconds
+        self.marks = []
+
+    def Mark(self, label):
+        self.marks.append((label, time.perf_counter()))
+
+    def Report(self, registry=None):
+        print("Startup breakdown:")
+        previous = self.start
+        for label, stamp in self.marks:
+            print(f"  {label:<24}{(stamp - previous) * 1000.0:9.1f} ms  (at {(stamp - self.start) * 1000.0:7.1f} ms)")
+            previous = stamp
+
+        if registry is not None:
+            for name, (thread, begin, end) in registry.timings.items():
+                label = f"load '{name}' ({thread})"
+                print(f"  {label:<24}{(end - begin) * 1000.0:9.1f} ms  (ready at {(end - self.start) * 1000.0:7.1f} ms)")
+            for name, waited in registry.waits.items():
+                label = f"blocked on '{name}'"
+                print(f"  {label:<24}{waited * 1000.0:9.1f} ms")
+
+        firstFrame = [stamp for label, stamp in self.marks if label == 'first frame']
+        if firstFrame:
+            total = firstFrame[0] - self.start
+            status = "within" if total <= self.budget else "OVER"
+            print(f"  time to first frame {total * 1000.0:.1f} ms, {status} budget of {self.budget * 1000.0:.0f} ms")
+
+startupProfile = StartupProfile()
@@ -0,0 +1,119 @@
+import functools
+import numpy as np
+from utils.spatial_hash import pairs_within, DENSE_PAIRS
+from utils.transforms import normalized
+
+###############################################################
+# Batched pirate steering
+#
+# Pursuit of the transporter blended 70/30 with avoidance of other pirates, planets and space stations, computed for
+# all pirates at once. Every pirate steers from the positions at the start of the tick (the old per-pirate loop let
+# later pirates see the already moved earlier ones, which made the result depend on list order).
+
+PURSUIT_WEIGHT, AVOIDANCE_WEIGHT = 0.7, 0.3
+
+def avoidance(positions, obstacles, radius, strength, excludeSelf=False, pairs=pairs_within):
+    # Sum over obstacles closer than radius (and not coincident) of (p - o) / |p - o|^2 * strength. pairs(a, b, radius)
+    # is the broadphase, it returns index pairs that include every pair closer than radius.
+    i, j = pairs(positions, obstacles, radius)
+    if excludeSelf:
+        i, j = i[i != j], j[i != j]
+    offsets = positions[i] - obstacles[j]
+    distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+    close = (distances < radius) & (distances > 0)
+    i, offsets, distances = i[close], offsets[close], distances[close]
+    contributions = offsets / (distances * distances)[:, np.newaxis] * strength
+    # bincount gives ints when there are no weights at all, so the sum is cast back to float
+    return np.stack([np.bincount(i, weights=contributions[:, k], minlength=len(positions)) for k in range(3)], axis=1).astype(np.float64)
+
+def dense_avoidance(positions, groups):
+    # avoidance() against several groups of (obstacles, radius, strength) at once, for sets small enough to test every
+    # pair: one pass over all the offsets instead of a broadphase and a second exact test per group. Each group is summed
+    # on its own and the sums are added in group order, so the result is bit for bit that of one avoidance() call per
+    # group. A position never repels itself, its distance is 0.
+    count = len(positions)
+    obstacles = np.concatenate([group[0] for group in groups])
+    column, radii, strengths = group_columns(*zip(*((len(obstacles), radius, strength) for obstacles, radius, strength in groups)))
+
+    offsets = positions[:, np.newaxis, :] - obstacles[np.newaxis, :, :]
+    distances = np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets))
+    i, j = np.nonzero((distances < radii) & (distances > 0))
+    distances = distances[i, j]
+    contributions = offsets[i, j] / (distances * distances)[:, np.newaxis] * strengths[j, np.newaxis]
+    subject = column[j] * count + i
+    sums = np.empty((len(groups) * count, 3)) # bincount gives ints when there are no weights at all, the copy casts them
+    for k in range(3):
+        sums[:, k] = np.bincount(subject, weights=contributions[:, k], minlength=len(groups) * count)
+    sums = sums.reshape(len(groups), count, 3)
+    total = sums[0]
+    for groupSum in sums[1:]:
+        total = total + groupSum
+    return total
+
+@functools.lru_cache(maxsize=16)
+def group_columns(sizes, radii, strengths):
+    # Group, radius and strength of every obstacle column of dense_avoidance(), the group sizes hardly ever change
+    return np.repeat(np.arange(len(sizes)), sizes), np.repeat(radii, sizes), np.repeat(strengths, sizes)
+
+def steer_pirates(pirates, target, planets, stations, separation=5.0, pairs=pairs_within):
+    # Returns the unit movement direction of every pirate (zero if it has none) and its distance to the target.
+    # Radii and strengths: other pirates 5.0 / 10, planets 15.0 / 20, space stations 5.0 / 15.
+    pursuit, distances = normalized(target - pirates)
+
+    if len(pirates) * (len(pirates) + len(planets) + len(stations)) <= DENSE_PAIRS:
+        avoid = dense_avoidance(pirates, [(pirates, separation, 10.0), (planets, separation * 3, 20.0), (stations, separation, 15.0)])
+    else:
+        avoid = avoidance(pirates, pirates, separation, 10.0, excludeSelf=True, pairs=pairs)
+        avoid += avoidance(pirates, planets, separation * 3, 20.0, pairs=pairs)
+        avoid += avoidance(pirates, stations, separation, 15.0, pairs=pairs)
+    avoid, _ = normalized(avoid)
+
+    directions, _ = normalized(PURSUIT_WEIGHT * pursuit + AVOIDANCE_WEIGHT * avoid)
+    return directions, distances
+
+def facing_rotations(directions):
+    # Pitch and yaw that make a model face along each direction
+    pitch = np.arctan2(-directions[:, 1], np.sqrt(directions[:, 0]**2 + directions[:, 2]**2))
+    yaw = np.arctan2(directions[:, 0], directions[:, 2])
+    return pitch, yaw
+
+###############################################################
+# Stacked worlds
+#
+# The same steering for many independent worlds at once: arrays get a leading world axis, and pirates past each
+# world's count are padding that neither steers nor repels. Contributions are summed in the same order as above
+# (obstacles in index order), so every world steers exactly as steer_pirates() would steer it on its own.
+
+def stacked_avoidance(positions, obstacles, valid, radius, strength):
+    # positions (W, N, 3), obstacles (W, M, 3), valid (W, N, M) the pairs that may repel. Candidates come from a cheap
+    # per-axis test with some slack, then the close pairs are tested and summed exactly as avoidance() does, gathered
+    # in (world, position, obstacle) order so that bincount() adds every position's contributions in the same order.
+    worlds, count = positions.shape[:2]
+    squared = sum((positions[:, :, np.newaxis, k] - obstacles[:, np.newaxis, :, k])**2 for k in range(3))
+    world, i, j = np.nonzero(valid & (squared < (radius * 1.001)**2))
+    offsets = positions[world, i] - obstacles[world, j]
+    distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+    close = (distances < radius) & (distances > 0)
+    world, i, offsets, distances = world[close], i[close], offsets[close], distances[close]
+    contributions = offsets / (distances * distances)[:, np.newaxis] * strength
+    subject = world * count + i
+    return np.stack([np.bincount(subject, weights=contributions[:, k], minlength=worlds * count) for k in range(3)], axis=1).astype(np.float64).reshape(positions.shape)
+
+def stacked_normalized(vectors):
+    result, norms = normalized(vectors.reshape(-1, 3))
+    return result.reshape(vectors.shape), norms.reshape(vectors.shape[:-1])
+
+def steer_pirates_stacked(pirates, alive, targets, planets, stations, separation=5.0):
+    # pirates (W, N, 3) with alive (W, N), targets (W, 3), planets (W, P, 3), stations (W, S, 3). Returns what
+    # steer_pirates() returns per world, with a world axis in front.
+    pursuit, distances = stacked_normalized(targets[:, np.newaxis, :] - pirates)
+
+    others = alive[:, np.newaxis, :] & ~np.eye(pirates.shape[1], dtype=bool)
+    everyone = np.ones((1, 1, 1), dtype=bool)
+    avoid = stacked_avoidance(pirates, pirates, others, separation, 10.0)
+    avoid += stacked_avoidance(pirates, planets, everyone, separation * 3, 20.0)
+    avoid += stacked_avoidance(pirates, stations, everyone, separation, 15.0)
+    avoid, _ = stacked_normalized(avoid)
+
+    directions, _ = stacked_normalized(PURSUIT_WEIGHT * pursuit + AVOIDANCE_WEIGHT * avoid)
+    return np.where(alive[..., np.newaxis], directions, 0.0), distances
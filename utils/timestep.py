@@ -0,0 +1,36 @@
+###############################################################
+# Fixed-timestep clock
+#
+# Real frame time is collected in an accumulator and paid out in ticks of exactly 1 / tickRate seconds, so the
+# simulation behaves the same at any frame rate and its cost is capped by the tick rate instead of the display. The
+# time left in the accumulator (less than one tick) gives the fraction the renderer blends between the last two ticks.
+# A frame never runs more than maxTicksPerFrame ticks: when the simulation cannot keep up, the excess time is dropped
+# (the game slows down) instead of every frame having more ticks to catch up on than the last.
+
+class FixedTimestep:
+    def __init__(self, tickRate=60, maxTicksPerFrame=5):
+        self.tickRate = tickRate
+        self.tickTime = 1.0 / tickRate
+        self.maxTicksPerFrame = maxTicksPerFrame
+        self.Reset()
+
+    def Reset(self):
+        self.accumulator = 0.0
+        self.ticks = 0 # Ticks run since the last reset
+        self.dropped = 0.0 # Seconds thrown away by the guard since the last reset
+
+    def Advance(self, frameTime):
+        # Number of ticks to run for frameTime seconds of real time. A small tolerance keeps a frame time of exactly one
+        # tick from paying out 0 and 2 ticks on alternate frames through rounding.
+        self.accumulator += max(frameTime, 0.0)
+        ticks = int(self.accumulator / self.tickTime + 1e-6)
+        self.accumulator -= ticks * self.tickTime
+        if ticks > self.maxTicksPerFrame:
+            self.dropped += (ticks - self.maxTicksPerFrame) * self.tickTime
+            ticks = self.maxTicksPerFrame
+        self.ticks += ticks
+        return ticks
+
+    def Alpha(self):
+        # How far real time is past the last tick, as a fraction of a tick (0: draw the previous tick, 1: the last one)
+        return min(max(self.accumulator / self.tickTime, 0.0), 1.0)
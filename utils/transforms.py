@@ -0,0 +1,50 @@
+import numpy as np
+
+###############################################################
+# Model matrices
+#
+# Transforms are [position, rotation, scale] rows of 9 floats, model matrices are built from whole arrays of them in one
+# vectorized pass. Entities keep their transforms in the EntityStore, which rebuilds only the matrices of rows whose
+# transform changed since they were last built (EntityStore.ModelMatrices()); Objects drawn on their own (the transporter
+# and the HUD) keep theirs in their properties and do the same per Object (Object.ComputeModelMatrix()).
+#
+# norms() and normalized() are np.linalg.norm() along the last axis without its wrapper, whose per-call overhead is most
+# of the cost on the few vectors a simulation tick handles.
+
+TRANSFORM_KEYS = ('position', 'rotation', 'scale')
+
+def norms(vectors):
+    # Euclidean length along the last axis, of (..., 3) vectors or of a single vector
+    return np.sqrt(np.add.reduce(vectors * vectors, axis=-1))
+
+def normalized(vectors):
+    # (N, 3) unit vectors and the norms they had, zero vectors stay zero
+    lengths = norms(vectors)
+    return vectors / np.where(lengths > 0, lengths, 1.0)[:, np.newaxis], lengths
+
+def model_matrices(positions, rotations, scales):
+    # Same matrix as translation @ Rz @ Ry @ Rx @ scale with rotation = [x, y, z] Euler angles, for (N, 3) inputs
+    count = len(positions)
+    cx, cy, cz = np.cos(rotations).T
+    sx, sy, sz = np.sin(rotations).T
+
+    matrices = np.zeros((count, 4, 4), dtype=np.float32)
+    matrices[:, 0, 0] = cz * cy * scales[:, 0]
+    matrices[:, 0, 1] = (cz * sy * sx - sz * cx) * scales[:, 1]
+    matrices[:, 0, 2] = (cz * sy * cx + sz * sx) * scales[:, 2]
+    matrices[:, 1, 0] = sz * cy * scales[:, 0]
+    matrices[:, 1, 1] = (sz * sy * sx + cz * cx) * scales[:, 1]
+    matrices[:, 1, 2] = (sz * sy * cx - cz * sx) * scales[:, 2]
+    matrices[:, 2, 0] = -sy * scales[:, 0]
+    matrices[:, 2, 1] = cy * sx * scales[:, 1]
+    matrices[:, 2, 2] = cy * cx * scales[:, 2]
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+def interpolate_transforms(previous, current, alpha):
+    # Blends (N, 9) [position, rotation, scale] rows, alpha 0 gives previous and 1 gives current. Angles turn the short
+    # way round, so a yaw going from pi to -pi does not spin the model through a full turn.
+    step = current - previous
+    step[:, 3:6] = (step[:, 3:6] + np.pi) % (2.0 * np.pi) - np.pi
+    return previous + alpha * step
@@ -49,13 +49,18 @@ class Window:
 
         # Delta time
         self.prevTime = glfw.get_time()
+        self.shouldClose = False
 
     def Close(self):
         self.impl.shutdown()
         glfw.terminate()
     
     def IsOpen(self):
-        return not glfw.window_should_close(self.window)
+        return not (self.shouldClose or glfw.window_should_close(self.window))
+
+    def SetSwapInterval(self, interval):
+        # 0 presents frames as soon as they are drawn, 1 waits for vertical sync
+        glfw.swap_interval(interval)
 
     def StartFrame(self, c0, c1, c2, c3):
         currentTime = glfw.get_time()
@@ -77,6 +82,7 @@ class Window:
             "L_SHIFT":False,
             "R_CLICK":False,
             "L_CLICK":False,
+            "F1":False,
             "mouseDelta": [0.0,0.0] # Get mouse offset from center per frame
             }
         
@@ -98,6 +104,8 @@ class Window:
             inputs["SPACE"] = True
         if glfw.get_key(self.window, glfw.KEY_LEFT_SHIFT) == glfw.PRESS:
             inputs["L_SHIFT"] = True
+        if glfw.get_key(self.window, glfw.KEY_F1) == glfw.PRESS:
+            inputs["F1"] = True
         if glfw.get_mouse_button(self.window, glfw.MOUSE_BUTTON_RIGHT) == glfw.PRESS:
             inputs["R_CLICK"] = True
         if glfw.get_mouse_button(self.window, glfw.MOUSE_BUTTON_LEFT) == glfw.PRESS: